@@ -0,0 +1,73 @@
+"""Measures memory needed for tokens and syntax trees of a large script.
+
+Usage: python benchmarks/parse_memory.py [--lines N] [WHAT ...]
+
+WHAT can be `tokens` (list of tokens), `token-array` (`TokenArray`) and
+`ast` (parsed statements). Each is measured in a separate process and the
+growth of its maximum resident set size is reported.
+"""
+import resource
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lox.parser import Parser    # noqa: E402
+from lox.scanner import Scanner    # noqa: E402
+
+
+FUNCTION = '''\
+fun function{i}(a, b) {{
+  var total = a * {i} + b;
+  var name = "function{i}";
+  if (total > 100) {{
+    total = total - (a + b) / 2;
+  }}
+  while (total < 1000) total = total * 2;
+  print name;
+  return total;
+}}
+'''
+
+
+def generate(lines: int) -> str:
+    return ''.join(FUNCTION.format(i=i) for i in range(lines // 10))
+
+
+def measure(what: str, lines: int):
+    source = generate(lines)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    scanner = Scanner(source, error)
+    if what == 'tokens':
+        result = scanner.scan_tokens()
+    elif what == 'token-array':
+        result = scanner.scan_token_array()
+    else:
+        result = Parser(scanner.scan_tokens_iter(), error).parse()
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f'{what:12} {len(result):>10} items {(after - before) / 1024:>8.1f} MB '
+          f'{elapsed:>7.2f} s')
+
+
+def error(*args):
+    raise RuntimeError(f'Invalid benchmark script: {args}')
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser()
+    parser.add_argument('--lines', type=int, default=1_000_000)
+    parser.add_argument('--measure', help='measure in this process')
+    parser.add_argument('what', nargs='*', default=['tokens', 'token-array', 'ast'])
+    args = parser.parse_args()
+    if args.measure:
+        measure(args.measure, args.lines)
+    else:
+        print(f'{args.lines} lines, {len(generate(args.lines)) / 1e6:.1f} MB')
+        for what in args.what:
+            subprocess.run([sys.executable, __file__, '--lines', str(args.lines),
+                            '--measure', what])
@@ -1,13 +1,89 @@
-from pathlib import Path
 import sys
+from argparse import ArgumentParser
+from pathlib import Path
 
+from .batch import run_batch
 from .lox import Lox
+from .numeric import NUMERIC_MODES
 
 
-match sys.argv[1:]:
-    case []:
-        Lox().run_prompt()
-    case [script]:
-        Lox().run_script(Path(script))
-    case _:
-        sys.exit('Usage: lox [script]')
+parser = ArgumentParser(prog='lox')
+parser.add_argument('scripts', nargs='*', type=Path, metavar='script',
+                    help='script to run, the interactive prompt is started if '
+                         'not given, with multiple scripts each is run with '
+                         'its own interpreter and a summary is printed')
+engine = parser.add_mutually_exclusive_group()
+engine.add_argument('--closures', dest='engine', action='store_const',
+                    const='closures', default='interpreter',
+                    help='compile to closures before executing')
+engine.add_argument('--stackless', dest='engine', action='store_const',
+                    const='stackless',
+                    help='execute without using the Python call stack for Lox '
+                         'calls, allowing deep recursion')
+engine.add_argument('--async', dest='engine', action='store_const',
+                    const='async',
+                    help='execute as a coroutine so that async native functions '
+                         'like sleep do not block, implies --stackless')
+engine.add_argument('--fibers', dest='engine', action='store_const',
+                    const='fibers',
+                    help='support fibers and channels using spawn, channel, send '
+                         'and receive native functions, implies --stackless')
+engine.add_argument('--vm', dest='engine', action='store_const', const='vm',
+                    help='compile to bytecode and execute it in a virtual machine')
+parser.add_argument('--max-depth', type=int, metavar='N',
+                    help='maximum Lox call depth with --stackless, --async, '
+                         '--fibers and --vm')
+parser.add_argument('--numbers', choices=NUMERIC_MODES, default='decimal',
+                    help='how to represent numbers (default: %(default)s)')
+parser.add_argument('-O', '--optimize', action='store_true',
+                    help='fold constants and remove dead code before executing')
+parser.add_argument('--print-ast', action='store_true',
+                    help='print the syntax tree instead of executing it')
+parser.add_argument('--no-cache', dest='cache', action='store_false',
+                    help='do not use or write compiled scripts in __loxcache__')
+parser.add_argument('--profile', action='store_true',
+                    help='sample executed lines and functions and report where '
+                         'time was spent')
+parser.add_argument('--profile-stacks', type=Path, metavar='PATH',
+                    help='write profiled call stacks to a file in the collapsed '
+                         'format used by flame graph tools (implies --profile)')
+parser.add_argument('-j', '--jobs', type=int, metavar='N',
+                    help='run scripts in N parallel processes')
+parser.add_argument('--stats', type=Path, metavar='PATH',
+                    help='count calls and evaluated nodes and write statistics '
+                         'to a JSON file when execution ends, use "-" to write '
+                         'them to the standard output')
+args = parser.parse_args()
+profile = args.profile or args.profile_stacks is not None
+if profile and args.engine in ('closures', 'stackless', 'async', 'fibers'):
+    parser.error(f'--profile is not supported with --{args.engine}')
+if args.stats and args.engine != 'interpreter':
+    parser.error(f'--stats is not supported with --{args.engine}')
+if args.max_depth is not None and args.engine in ('interpreter', 'closures'):
+    parser.error('--max-depth requires --stackless, --async, --fibers or --vm')
+if len(args.scripts) > 1 or args.jobs is not None:
+    if not args.scripts:
+        parser.error('--jobs requires scripts')
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    if profile or args.stats:
+        parser.error('--profile and --stats are not supported with multiple '
+                     'scripts or --jobs')
+    options = dict(engine=args.engine, numbers=args.numbers,
+                   optimize=args.optimize, print_ast=args.print_ast,
+                   cache=args.cache, max_depth=args.max_depth)
+    sys.exit(run_batch(args.scripts, options, args.jobs))
+lox = Lox(args.engine, args.numbers, args.optimize, args.print_ast, args.cache,
+          profile, args.stats is not None, args.max_depth)
+try:
+    if args.scripts:
+        lox.run_script(args.scripts[0], freeze=True)
+    else:
+        lox.run_prompt()
+finally:
+    if lox.profiler:
+        lox.profiler.report()
+        if args.profile_stacks:
+            lox.profiler.write_collapsed(args.profile_stacks)
+    if lox.stats:
+        lox.stats.write_json(args.stats if str(args.stats) != '-' else None)
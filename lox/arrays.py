@@ -0,0 +1,145 @@
+import math
+from array import array
+from itertools import repeat
+from operator import add, mul
+from typing import TYPE_CHECKING
+
+from .classes import LoxClass
+from .exceptions import NativeError
+from .expressions import Literal
+from .functions import Callable, EngineNativeFunction, NativeFunction
+from .numeric import Numbers
+from .types import LoxType
+
+if TYPE_CHECKING:
+    from .engine import Engine
+
+
+class LoxArray:
+    """Fixed size array of floats created with the `array` native function.
+
+    Values are stored unboxed in an `array.array`, and bulk operations like
+    `sum` and `scale` run in C loops. Values are converted to floats when
+    stored and back to Lox numbers when read. Arrays are compared by
+    identity like instances.
+    """
+    __slots__ = ('values',)
+
+    def __init__(self, values: array):
+        self.values = values
+
+    def __str__(self) -> str:
+        return '[' + ', '.join(str(Literal(value)) for value in self.values) + ']'
+
+
+def array_functions(numbers: Numbers) -> dict[str, NativeFunction]:
+
+    def from_float(value: float) -> LoxType:
+        # Integral values are converted like integer literals so that, with
+        # decimals, `2.0` read from an array is shown as `2` like in arrays.
+        if value.is_integer() and abs(value) < 2**53:
+            return numbers.from_int(int(value))
+        return numbers.from_float(value)
+
+    def check_array(value: LoxType) -> array:
+        if not isinstance(value, LoxArray):
+            raise NativeError(f'Expected an array, got {Literal(value)}.')
+        return value.values
+
+    def check_same_size(a: LoxType, b: LoxType) -> tuple[array, array]:
+        first, second = check_array(a), check_array(b)
+        if len(first) != len(second):
+            raise NativeError(f'Arrays must have the same size, got {len(first)} '
+                              f'and {len(second)}.')
+        return first, second
+
+    def to_float(value: LoxType) -> float:
+        if type(value) not in numbers.types:
+            raise NativeError(f'Expected a number, got {Literal(value)}.')
+        try:
+            return float(value)    # type: ignore
+        except OverflowError:
+            raise NativeError('Number is too large for an array.') from None
+
+    def check_index(value: LoxType, size: int) -> int:
+        if type(value) not in numbers.types or value % 1 != 0:    # type: ignore
+            raise NativeError(f'Expected an integer, got {Literal(value)}.')
+        if not 0 <= value < size:    # type: ignore
+            raise NativeError(f'Array index {value} out of range.')
+        return int(value)    # type: ignore
+
+    def create(size):
+        if type(size) not in numbers.types or size % 1 != 0 or size < 0:
+            raise NativeError(f'Array size must be a non-negative integer, '
+                              f'got {Literal(size)}.')
+        return LoxArray(array('d', bytes(8 * int(size))))
+
+    def get(arr, index):
+        values = check_array(arr)
+        return from_float(values[check_index(index, len(values))])
+
+    def set(arr, index, value):
+        values = check_array(arr)
+        values[check_index(index, len(values))] = to_float(value)
+
+    def size(arr):
+        return numbers.from_int(len(check_array(arr)))
+
+    def fill(arr, value):
+        values = check_array(arr)
+        values[:] = array('d', [to_float(value)]) * len(values)
+
+    def total(arr):
+        return from_float(math.fsum(check_array(arr)))
+
+    def minimum(arr):
+        if not (values := check_array(arr)):
+            raise NativeError('Array is empty.')
+        return from_float(min(values))
+
+    def maximum(arr):
+        if not (values := check_array(arr)):
+            raise NativeError('Array is empty.')
+        return from_float(max(values))
+
+    def dot(a, b):
+        return from_float(math.fsum(map(mul, *check_same_size(a, b))))
+
+    def scale(arr, factor):
+        values = check_array(arr)
+        values[:] = array('d', map(mul, values, repeat(to_float(factor))))
+
+    def add_array(a, b):
+        a, b = check_same_size(a, b)
+        a[:] = array('d', map(add, a, b))
+
+    def apply(engine: 'Engine', arr, function):
+        """Returns a new array with `function` called for each value."""
+        values = check_array(arr)
+        if not isinstance(function, Callable) or isinstance(function, LoxClass) \
+                or function.arity != 1:
+            raise NativeError(f'Expected a function accepting one argument, '
+                              f'got {Literal(function)}.')
+        call = engine.call_nested
+        try:
+            return LoxArray(array('d', [to_float(call(function, [from_float(value)]))
+                                        for value in values]))
+        except RecursionError:
+            # Nested calls use the Python stack also with the stackless
+            # interpreter and the VM.
+            raise NativeError('Stack overflow.') from None
+
+    return {func.name: func for func in (
+        NativeFunction('array', 1, create),
+        NativeFunction('get', 2, get),
+        NativeFunction('set', 3, set),
+        NativeFunction('len', 1, size),
+        NativeFunction('fill', 2, fill),
+        NativeFunction('sum', 1, total),
+        NativeFunction('min', 1, minimum),
+        NativeFunction('max', 1, maximum),
+        NativeFunction('dot', 2, dot),
+        NativeFunction('scale', 2, scale),
+        NativeFunction('add', 2, add_array),
+        EngineNativeFunction('apply', 2, apply),
+    )}
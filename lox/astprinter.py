@@ -1,9 +1,11 @@
-from .expressions import Expr
-from .statements import Stmt
+from .expressions import (Assign, Binary, Expr, Get, Literal, Logical, Set, Super,
+                          Unary, Variable)
+from .statements import Class, Function, Stmt, Var
 from .visitor import Visitor
 
 
 class AstPrinter(Visitor):
+    """Prints syntax trees one node per line, children indented."""
 
     def __init__(self):
         self.level = 0
@@ -15,10 +17,35 @@ class AstPrinter(Visitor):
     def print(self, node: Expr|Stmt):
         return self.visit(node)
 
+    def visit(self, node: Expr|Stmt):
+        self.start(node)
+        super().visit(node)
+        self.end(node)
+
     def start(self, node: Stmt|Expr):
-        self.output(type(node).__name__)
+        details = self.details(node)
+        self.output(f'{type(node).__name__} {details}' if details else
+                    type(node).__name__)
         self.level += 1
 
+    def details(self, node: Stmt|Expr) -> str:
+        match node:
+            case Function(name=name, params=params):
+                return f"{name.lexeme}({', '.join(p.lexeme for p in params)})"
+            case Assign(name=name) | Class(name=name) | Get(name=name) | \
+                    Set(name=name) | Var(name=name) | Variable(name=name):
+                return name.lexeme
+            case Binary(operator=operator) | Logical(operator=operator) | \
+                    Unary(operator=operator):
+                return operator.lexeme
+            case Literal(value=str(value)):
+                return repr(value)
+            case Literal():
+                return str(node)
+            case Super(method=method):
+                return method.lexeme
+        return ''
+
     def output(self, message: str):
         print(' ' * self.indent, end='')
         print(message)
@@ -0,0 +1,129 @@
+import asyncio
+from functools import cache
+from pathlib import Path
+from types import GeneratorType
+from typing import Any, Coroutine, Generator
+
+from .environment import Environment, GlobalEnvironment
+from .exceptions import LoxError, NativeError, RunError
+from .expressions import Expr, Literal
+from .functions import AsyncNativeFunction
+from .numeric import Numbers
+from .stackless import StacklessInterpreter
+from .statements import Stmt
+from .token import Token
+from .types import LoxType
+
+
+class Await:
+    """Yielded by `AsyncInterpreter.call_value` to get a coroutine awaited."""
+    __slots__ = ('coroutine', 'paren')
+
+    def __init__(self, coroutine: Coroutine[Any, Any, LoxType], paren: Token|None):
+        self.coroutine = coroutine
+        self.paren = paren
+
+
+class AsyncInterpreter(StacklessInterpreter):
+    """Interpreter that runs programs as coroutines.
+
+    Generators used by `StacklessInterpreter` are driven by a coroutine that
+    awaits async native functions like `sleep`. Because Lox calls do not use
+    the Python call stack, the whole program is suspended while waiting, and
+    other programs can run in the same event loop. If `switch_interval` is
+    set, control is also given to the event loop after every that many
+    executed statements.
+
+    Programs are run with `interpret_async`. `interpret` runs them in a new
+    event loop.
+    """
+    switch_interval: int|None = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.globals.values.update(async_functions(self.numbers))
+        self.countdown = 0
+
+    def interpret(self, statements: list[Stmt]):
+        asyncio.run(self.interpret_async(statements))
+
+    async def interpret_async(self, statements: list[Stmt]):
+        self.countdown = self.switch_interval or 0
+        try:
+            for stmt in statements:
+                await self.run_async(stmt)
+        except LoxError as err:
+            self.environment = self.globals
+            self.depth = 0
+            self.error_reporter(err)
+
+    async def run_async(self, node: Stmt|Expr):
+        result = self.visit(node)
+        if type(result) is not GeneratorType:
+            return result
+        return await self.drive_async(result)
+
+    async def drive_async(self, generator: Generator):
+        stack = [generator]
+        result = None
+        interval = self.switch_interval
+        while stack:
+            try:
+                node = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+                continue
+            if type(node) is Await:
+                try:
+                    result = await node.coroutine
+                except NativeError as err:
+                    raise RunError(str(err), node.paren) from None    # type: ignore
+                continue
+            if interval and isinstance(node, Stmt):
+                self.countdown -= 1
+                if not self.countdown:
+                    self.countdown = interval
+                    await asyncio.sleep(0)
+            result = self.visit(node)
+            if type(result) is GeneratorType:
+                stack.append(result)
+                result = None
+        return result
+
+    def visit_Await(self, node: Await):
+        # Nested calls made by native functions are run with the synchronous
+        # `drive` that cannot await.
+        node.coroutine.close()
+        raise NativeError('Async functions cannot be called from native functions.')
+
+    def call_value(self, callee: LoxType, arguments: list[LoxType], paren: Token|None,
+                   closure: Environment|GlobalEnvironment|None = None):
+        if isinstance(callee, AsyncNativeFunction) and callee.arity == len(arguments):
+            return (yield Await(callee.call_async(arguments), paren))
+        return (yield from super().call_value(callee, arguments, paren, closure))
+
+
+@cache
+def async_functions(numbers: Numbers) -> dict[str, AsyncNativeFunction]:
+
+    async def sleep(seconds):
+        if type(seconds) not in numbers.types or seconds < 0:
+            raise NativeError(f'Expected a non-negative number, got {Literal(seconds)}.')
+        try:
+            await asyncio.sleep(float(seconds))
+        except OverflowError:
+            raise NativeError('Sleeping time is too long.') from None
+
+    async def read_file(path):
+        if type(path) is not str:
+            raise NativeError(f'Expected a string, got {Literal(path)}.')
+        try:
+            return await asyncio.to_thread(Path(path).read_text)
+        except (OSError, UnicodeDecodeError) as err:
+            raise NativeError(f"Reading file '{path}' failed: {err}") from None
+
+    return {func.name: func for func in (
+        AsyncNativeFunction('sleep', 1, sleep),
+        AsyncNativeFunction('read_file', 1, read_file),
+    )}
@@ -0,0 +1,90 @@
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass
+from functools import partial
+from io import StringIO
+from pathlib import Path
+from typing import Any, Iterator
+
+from .lox import Lox
+
+
+@dataclass
+class ScriptResult:
+    path: Path
+    exit_code: int
+    stdout: str
+    stderr: str
+    time: float
+
+
+def run_script(path: Path, options: dict[str, Any]) -> ScriptResult:
+    """Runs a script with a new `Lox` instance capturing its output.
+
+    `options` are passed to `Lox`.
+    """
+    stdout, stderr = StringIO(), StringIO()
+    start = time.perf_counter()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            Lox(**options).run_script(path)
+        except SystemExit as err:
+            # Like Python, treat `None` as success and other non-integers
+            # as failure.
+            code = err.code
+            exit_code = code if isinstance(code, int) else int(code is not None)
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+        else:
+            exit_code = 0
+    return ScriptResult(path, exit_code, stdout.getvalue(), stderr.getvalue(),
+                        time.perf_counter() - start)
+
+
+def run_scripts(paths: list[Path], options: dict[str, Any],
+                jobs: int|None = None) -> Iterator[ScriptResult]:
+    """Runs scripts and yields their results in the given order.
+
+    If `jobs` is given, scripts are run in that many worker processes that
+    are reused between scripts. Otherwise scripts are run in this process.
+    Either way scripts must not leave anything behind, which is why
+    `run_script` does not use `Lox.run_script(freeze=True)`.
+    """
+    run = partial(run_script, options=options)
+    if jobs is None:
+        yield from map(run, paths)
+    else:
+        with ProcessPoolExecutor(jobs) as executor:
+            yield from executor.map(run, paths)
+
+
+def run_batch(paths: list[Path], options: dict[str, Any],
+              jobs: int|None = None) -> int:
+    """Runs scripts, writes their output and a summary, and returns exit code.
+
+    The exit code is the highest exit code of the scripts.
+    """
+    start = time.perf_counter()
+    results = []
+    for result in run_scripts(paths, options, jobs):
+        print(f'==> {result.path} <==', flush=True)
+        sys.stdout.write(result.stdout)
+        sys.stdout.flush()
+        sys.stderr.write(result.stderr)
+        sys.stderr.flush()
+        results.append(result)
+    elapsed = time.perf_counter() - start
+    width = max(len(str(result.path)) for result in results)
+    print()
+    for result in results:
+        status = 'ok' if result.exit_code == 0 else f'exit {result.exit_code}'
+        print(f'{str(result.path):<{width}}  {result.time:8.3f}s  {status}')
+    failed = sum(1 for result in results if result.exit_code != 0)
+    print(f'{len(results)} scripts, {failed} failed, '
+          f'{sum(result.time for result in results):.3f}s total, '
+          f'{elapsed:.3f}s elapsed')
+    return max(result.exit_code for result in results)
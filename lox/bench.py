@@ -0,0 +1,149 @@
+"""Runs Lox benchmarks and compares results against a baseline.
+
+Usage: python -m lox.bench [options] [name ...]
+
+Benchmarks are `*.lox` files in the `benchmarks` directory. Each of them
+is run in a separate process and its wall time and peak memory usage are
+measured. A `// ops: N` comment in a benchmark tells how many operations
+it performs and is used for calculating operations per second.
+
+Results can be saved as JSON with `--output` and later used as a baseline
+with `--baseline`. Benchmarks that got slower than the baseline by more
+than the threshold are reported as regressions, and the exit code is
+non-zero if there are regressions or failures.
+"""
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+
+BENCHMARKS = Path(__file__).parent.parent / 'benchmarks'
+
+
+@dataclass
+class Result:
+    name: str
+    time: float
+    ops: int
+    peak_memory: int    # Bytes.
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.ops / self.time
+
+
+class BenchmarkFailed(Exception):
+    pass
+
+
+def parse_ops(path: Path) -> int:
+    match = re.search(r'^// ops: (\d+)$', path.read_text(), re.MULTILINE)
+    return int(match.group(1)) if match else 1
+
+
+def run_once(path: Path, lox_args: list[str]) -> tuple[float, int]:
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'lox', '--no-cache',
+                                *lox_args, str(path)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    errors = process.stderr.read()    # type: ignore
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise BenchmarkFailed(errors.decode().strip() or
+                              f'Exit code {process.returncode}.')
+    # `ru_maxrss` is in kilobytes on Linux but in bytes on macOS.
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return elapsed, usage.ru_maxrss * scale
+
+
+def run_benchmark(path: Path, lox_args: list[str], repeat: int = 1) -> Result:
+    runs = [run_once(path, lox_args) for _ in range(repeat)]
+    return Result(path.stem, min(t for t, _ in runs), parse_ops(path),
+                  max(m for _, m in runs))
+
+
+def save(results: list[Result], lox_args: list[str], path: Path):
+    data = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'lox_args': lox_args,
+        'results': {r.name: {**asdict(r), 'ops_per_sec': r.ops_per_sec}
+                    for r in results}
+    }
+    path.write_text(json.dumps(data, indent=2) + '\n')
+
+
+def load(path: Path) -> dict[str, Result]:
+    data = json.loads(path.read_text())
+    return {name: Result(name, r['time'], r['ops'], r['peak_memory'])
+            for name, r in data['results'].items()}
+
+
+def report(result: Result, baseline: Result|None, threshold: float) -> bool:
+    """Prints a result line. Returns `True` if the result is a regression."""
+    line = (f'{result.name:20} {result.time:8.3f}s {result.ops_per_sec:12,.0f} '
+            f'{result.peak_memory / 2**20:8.1f} MB')
+    regression = False
+    if baseline:
+        change = result.time / baseline.time - 1
+        regression = change > threshold
+        line += f' {change:+8.1%}' + ('  REGRESSION' if regression else '')
+    print(line)
+    return regression
+
+
+def main(argv: list[str]|None = None) -> int:
+    parser = ArgumentParser(prog='python -m lox.bench',
+                            description='Run Lox benchmarks.')
+    parser.add_argument('names', nargs='*', metavar='name',
+                        help='benchmarks to run (default: all)')
+    parser.add_argument('--dir', type=Path, default=BENCHMARKS,
+                        help='directory containing benchmarks')
+    parser.add_argument('--lox-args', default='',
+                        help='arguments to pass to lox, for example "--vm -O"')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='run benchmarks this many times and use the best time')
+    parser.add_argument('--output', type=Path, help='save results to this JSON file')
+    parser.add_argument('--baseline', type=Path,
+                        help='compare results to results saved earlier')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression '
+                             '(default: %(default)s)')
+    args = parser.parse_args(argv)
+    lox_args = args.lox_args.split()
+    paths = sorted(args.dir.glob('*.lox'))
+    if args.names:
+        paths = [p for p in paths if p.stem in args.names]
+    baseline = load(args.baseline) if args.baseline else {}
+    print(f'{"benchmark":20} {"time":>9} {"ops/sec":>12} {"memory":>11}'
+          + (f' {"change":>8}' if baseline else ''))
+    results = []
+    failures = regressions = 0
+    for path in paths:
+        try:
+            result = run_benchmark(path, lox_args, args.repeat)
+        except BenchmarkFailed as err:
+            print(f'{path.stem:20} FAILED: {err}')
+            failures += 1
+        else:
+            results.append(result)
+            regressions += report(result, baseline.get(result.name), args.threshold)
+    if args.output:
+        save(results, lox_args, args.output)
+    if regressions or failures:
+        print(f'{regressions} regression(s), {failures} failure(s).')
+    return 1 if regressions or failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import gc
+import hashlib
+import os
+import pickle
+from functools import cache
+from pathlib import Path
+
+from .statements import Stmt
+
+
+@cache
+def interpreter_version() -> bytes:
+    """Digest of the interpreter source code.
+
+    Any change to the interpreter may change the syntax tree classes or how
+    scripts are compiled, so such changes invalidate cached scripts.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(Path(__file__).parent.glob('*.py')):
+        digest.update(path.read_bytes())
+    return digest.digest()
+
+
+class ScriptCache:
+    """Caches compiled scripts in `__loxcache__` directories next to them.
+
+    Cache files are keyed by the script source, the interpreter version and
+    the options affecting compilation. Failing to read or write the cache
+    is silently ignored.
+    """
+    magic = b'LOXC'
+
+    def __init__(self, numbers: str, optimize: bool):
+        self.options = f'{numbers} {optimize}'.encode()
+
+    def key(self, source: str) -> bytes:
+        digest = hashlib.sha256(interpreter_version())
+        digest.update(self.options)
+        digest.update(source.encode())
+        return self.magic + digest.digest()
+
+    def path(self, script: Path) -> Path:
+        return script.parent / '__loxcache__' / (script.name + 'c')
+
+    def load(self, script: Path, source: str) -> list[Stmt]|None:
+        key = self.key(source)
+        # Loaded syntax trees consist of lots of objects that stay alive while
+        # they are executed. Collecting garbage while loading them would waste
+        # time.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.path(script), 'rb') as file:
+                if file.read(len(key)) != key:
+                    return None
+                statements = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            return None
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return statements
+
+    def save(self, script: Path, source: str, statements: list[Stmt]):
+        path = self.path(script)
+        temp = path.with_name(f'{path.name}.{os.getpid()}')
+        try:
+            data = pickle.dumps(statements, pickle.HIGHEST_PROTOCOL)
+            path.parent.mkdir(exist_ok=True)
+            with open(temp, 'wb') as file:
+                file.write(self.key(source))
+                file.write(data)
+            os.replace(temp, path)
+        except (OSError, pickle.PicklingError, RecursionError):
+            temp.unlink(missing_ok=True)
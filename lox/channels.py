@@ -0,0 +1,27 @@
+from collections import deque
+from typing import TYPE_CHECKING
+
+from .types import LoxType
+
+if TYPE_CHECKING:
+    from .fibers import Fiber
+
+
+class LoxChannel:
+    """Channel created with the `channel` native function.
+
+    Values are buffered until `capacity` is reached, after which senders
+    wait until the values are received. With capacity zero, each sender
+    waits for a receiver. Channels are compared by identity like instances.
+    """
+    __slots__ = ('capacity', 'items', 'senders', 'receivers')
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.items: deque[LoxType] = deque()
+        # Blocked senders with values they are sending and blocked receivers.
+        self.senders: deque[tuple['Fiber', LoxType]] = deque()
+        self.receivers: deque['Fiber'] = deque()
+
+    def __str__(self) -> str:
+        return '<channel>'
@@ -0,0 +1,89 @@
+from array import array
+from enum import IntEnum
+
+from .types import LoxType
+
+
+class OpCode(IntEnum):
+    CONSTANT = 0            # index:u16
+    NIL = 1
+    TRUE = 2
+    FALSE = 3
+    POP = 4
+    GET_LOCAL = 5           # slot:u8
+    SET_LOCAL = 6           # slot:u8
+    GET_GLOBAL = 7          # name:u16
+    DEFINE_GLOBAL = 8       # name:u16
+    SET_GLOBAL = 9          # name:u16
+    GET_UPVALUE = 10        # index:u8
+    SET_UPVALUE = 11        # index:u8
+    GET_PROPERTY = 12       # name:u16
+    SET_PROPERTY = 13       # name:u16
+    GET_SUPER = 14          # name:u16
+    EQUAL = 15
+    NOT_EQUAL = 16
+    GREATER = 17
+    GREATER_EQUAL = 18
+    LESS = 19
+    LESS_EQUAL = 20
+    ADD = 21
+    SUBTRACT = 22
+    MULTIPLY = 23
+    DIVIDE = 24
+    NOT = 25
+    NEGATE = 26
+    PRINT = 27
+    JUMP = 28               # offset:u16
+    JUMP_IF_FALSE = 29      # offset:u16
+    LOOP = 30               # offset:u16
+    CALL = 31               # argc:u8
+    CLOSURE = 32            # function:u16, (is_local:u8, index:u8) per upvalue
+    CLOSE_UPVALUE = 33
+    RETURN = 34
+    CLASS = 35              # name:u16, methods:u8, has_superclass:u8
+    TAIL_CALL = 36          # argc:u8
+
+
+class Chunk:
+    """Compiled bytecode with its constant pool and line table.
+
+    `code` is a flat byte buffer of opcodes and their operands. `lines`
+    contains the source line of each byte in `code` for error reporting.
+    """
+
+    def __init__(self):
+        self.code = bytearray()
+        self.constants: list[LoxType|'BytecodeFunction'] = []
+        self.lines = array('i')
+        self._constant_indices: dict[str, int] = {}
+
+    def write(self, byte: int, line: int):
+        self.code.append(byte)
+        self.lines.append(line)
+
+    def add_constant(self, value: 'LoxType|BytecodeFunction') -> int:
+        if isinstance(value, BytecodeFunction):
+            self.constants.append(value)
+            return len(self.constants) - 1
+        # `repr` keeps e.g. `Decimal('1')` and `Decimal('1.0')` separate.
+        key = repr(value)
+        if key not in self._constant_indices:
+            self.constants.append(value)
+            self._constant_indices[key] = len(self.constants) - 1
+        return self._constant_indices[key]
+
+    def freeze(self):
+        self.code = bytes(self.code)
+        self._constant_indices.clear()
+
+
+class BytecodeFunction:
+
+    def __init__(self, name: str, arity: int = 0):
+        self.name = name
+        self.arity = arity
+        self.upvalue_count = 0
+        self.chunk = Chunk()
+
+    def __str__(self):
+        return f'<fn {self.name}>' if self.name else '<script>'
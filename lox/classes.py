@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, cast
 
 from .exceptions import RunError
 from .functions import Callable, LoxFunction
@@ -6,6 +6,7 @@ from .token import Token
 from .types import LoxType
 
 if TYPE_CHECKING:
+    from .engine import Engine
     from .interpreter import Interpreter
 
 
@@ -16,46 +17,94 @@ class LoxClass(Callable):
         self.name = name
         self.superclass = superclass
         self.methods = methods
+        # Classes are immutable, so inherited methods can be looked up once.
+        self.method_table: dict[str, LoxFunction] = \
+            {**superclass.method_table, **methods} if superclass is not None else methods
+        self.shape = Shape(self)
 
     @property
     def arity(self) -> int:
         initializer = self.find_method('init')
         return initializer.arity if initializer is not None else 0
 
-    def call(self, interpreter: 'Interpreter', arguments: list[LoxType]) -> 'LoxInstance':
+    def call(self, engine: 'Engine', arguments: list[LoxType]) -> 'LoxInstance':
         instance = LoxInstance(self)
         initializer = self.find_method('init')
         if initializer is not None:
-            initializer.bind(instance).call(interpreter, arguments)
+            initializer.call_bound(cast('Interpreter', engine), instance, arguments)
         return instance
 
     def find_method(self, name: str):
-        if name in self.methods:
-            return self.methods[name]
-        if self.superclass is not None:
-            return self.superclass.find_method(name)
-        return None
+        return self.method_table.get(name)
 
     def __str__(self):
         return f'<cls {self.name}>'
 
 
+class Shape:
+    """Layout of instance fields shared by instances with same field order.
+
+    Maps field names to indices in `LoxInstance.fields`. Adding a new field
+    to an instance transitions it to a new shape, and instances getting
+    same fields in same order end up sharing shapes.
+    """
+    __slots__ = ('klass', 'slots', 'transitions')
+
+    def __init__(self, klass: LoxClass, slots: dict[str, int]|None = None):
+        self.klass = klass
+        self.slots = slots or {}
+        self.transitions: dict[str, Shape] = {}
+
+    def add_field(self, name: str) -> 'Shape':
+        if name not in self.transitions:
+            slots = {**self.slots, name: len(self.slots)}
+            self.transitions[name] = Shape(self.klass, slots)
+        return self.transitions[name]
+
+    def lookup(self, name: Token) -> 'int|LoxFunction':
+        """Returns index of field `name` or, if there is no such field, method."""
+        slot = self.slots.get(name.lexeme)
+        if slot is not None:
+            return slot
+        method = self.klass.find_method(name.lexeme)
+        if method is None:
+            raise RunError(f"Undefined property '{name.lexeme}'.", name)
+        return method
+
+    def store_target(self, name: Token) -> 'int|Shape':
+        """Returns index of field `name` or shape to use when adding it."""
+        slot = self.slots.get(name.lexeme)
+        return slot if slot is not None else self.add_field(name.lexeme)
+
+
 class LoxInstance:
+    __slots__ = ('shape', 'fields')
 
     def __init__(self, klass: LoxClass):
-        self.klass = klass
-        self.fields: dict[str, LoxType] = {}
+        self.shape = klass.shape
+        self.fields: list[LoxType] = []
+
+    @property
+    def klass(self) -> LoxClass:
+        return self.shape.klass
 
     def get(self, name: Token) -> LoxType:
-        if name.lexeme in self.fields:
-            return self.fields[name.lexeme]
-        method = self.klass.find_method(name.lexeme)
-        if method is not None:
-            return method.bind(self)
-        raise RunError(f"Undefined property '{name.lexeme}'.", name)
+        return self.get_member(self.shape.lookup(name))
+
+    def get_member(self, member: 'int|LoxFunction') -> LoxType:
+        if type(member) is int:
+            return self.fields[member]
+        return member.bind(self)    # type: ignore
 
     def set(self, name: Token, value: LoxType):
-        self.fields[name.lexeme] = value
+        self.store(self.shape.store_target(name), value)
+
+    def store(self, target: 'int|Shape', value: LoxType):
+        if type(target) is int:
+            self.fields[target] = value
+        else:
+            self.shape = target    # type: ignore
+            self.fields.append(value)
 
     def __str__(self):
         return f'<{self.klass.name} instance>'
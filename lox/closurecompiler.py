@@ -0,0 +1,515 @@
+import typing
+
+from .classes import LoxClass, LoxInstance
+from .completion import BREAK, Completion, ReturnValue, TailCall
+from .environment import Environment, GlobalEnvironment
+from .exceptions import LoxError, NativeError, RunError
+from .expressions import (GLOBAL, Assign, Binary, Call, Get, Grouping, Literal, Logical,
+                          Set, Super, This, Unary, Variable)
+from .functions import Callable, LoxFunction
+from .interpreter import Interpreter
+from .rope import concat
+from .statements import (Block, Break, Class, Expression, Function, If, Print, Return,
+                         Stmt, Var, While)
+from .token import Token, TokenType
+from .types import LoxType
+from .visitor import Visitor
+
+
+Code = typing.Callable[[Environment|GlobalEnvironment], LoxType|Completion]
+
+
+class ClosureInterpreter(Interpreter):
+    """Interpreter that compiles statements to closures before running them.
+
+    Produces the same results as the tree-walking `Interpreter`, but nodes
+    are dispatched only once when compiling, not every time they are
+    evaluated.
+    """
+
+    def interpret(self, statements: list[Stmt]):
+        compiler = ClosureCompiler(self)
+        self.interpret_compiled(compiler.compile(statements), compiler.runtime)
+
+    def interpret_compiled(self, code: tuple['Code', ...], runtime: 'Runtime'):
+        """Runs code compiled earlier, possibly with another interpreter."""
+        runtime.interpreter = self
+        runtime.globals = self.globals
+        try:
+            for stmt in code:
+                stmt(self.globals)
+        except LoxError as err:
+            self.error_reporter(err)
+
+
+class Runtime:
+    """Interpreter running compiled code and its global variables.
+
+    Compiled code accesses them via this object, so the same code can be
+    run by different interpreters, but only by one at a time.
+    """
+    __slots__ = ('interpreter', 'globals')
+
+    def __init__(self, interpreter: ClosureInterpreter):
+        self.interpreter = interpreter
+        self.globals = interpreter.globals
+
+
+class CompiledFunction(LoxFunction):
+
+    def __init__(self, declaration: Function, body: tuple[Code, ...],
+                 closure: Environment|GlobalEnvironment, is_method: bool = False):
+        super().__init__(declaration, closure, is_method)
+        self.body = body
+
+    def run(self, interpreter: Interpreter, closure: Environment|GlobalEnvironment,
+            arguments: list[LoxType]) -> LoxType:
+        function = self
+        while True:
+            environment = Environment(closure, arguments)
+            completion = None
+            for stmt in function.body:
+                if (completion := stmt(environment)) is not None:
+                    break
+            if type(completion) is not TailCall:
+                break
+            function = completion.function    # type: ignore
+            closure = completion.closure
+            arguments = completion.arguments
+        if function.is_initializer:
+            assert type(closure) is Environment    # Make mypy happy.
+            return closure.values[0]
+        return completion.value if type(completion) is ReturnValue else None
+
+    def bind(self, instance: LoxInstance):
+        environment = Environment(self.closure, [instance])
+        return CompiledFunction(self.declaration, self.body, environment,
+                                is_method=True)
+
+
+class ClosureCompiler(Visitor):
+    """Compiles resolved statements and expressions to Python closures.
+
+    Every `visit_Node` method returns a function that gets the current
+    environment as its sole argument. Operators and resolved variable
+    depths are looked up at compile time and baked into the closures.
+    Stateless helpers like operand checks are taken from `interpreter`, but
+    the interpreter running the code and global variables are looked up
+    from `runtime` when the code is run.
+    """
+
+    def __init__(self, interpreter: ClosureInterpreter):
+        self.interpreter = interpreter
+        self.runtime = Runtime(interpreter)
+
+    def compile(self, statements: list[Stmt]) -> tuple[Code, ...]:
+        return tuple(self.visit(stmt) for stmt in statements)
+
+    def visit_Block(self, stmt: Block) -> Code:
+        body = self.compile(stmt.statements)
+
+        def block(env):
+            env = Environment(env)
+            for stmt in body:
+                if (completion := stmt(env)) is not None:
+                    return completion
+            return None
+
+        return block
+
+    def visit_Break(self, stmt: Break) -> Code:
+
+        def break_(env):
+            return BREAK
+
+        return break_
+
+    def visit_Class(self, stmt: Class) -> Code:
+        name = stmt.name.lexeme
+        superclass_token = stmt.superclass.name if stmt.superclass else None
+        superclass_code = self.visit(stmt.superclass) if stmt.superclass else None
+        methods = [(meth, self.compile(meth.body)) for meth in stmt.methods]
+
+        def class_(env):
+            if superclass_code is not None:
+                superclass = superclass_code(env)
+                if not isinstance(superclass, LoxClass):
+                    raise RunError('Superclass must be a class.', superclass_token)
+            else:
+                superclass = None
+            closure = Environment(env, [superclass]) if superclass else env
+            klass = LoxClass(name, superclass, {
+                meth.name.lexeme: CompiledFunction(meth, body, closure, is_method=True)
+                for meth, body in methods
+            })
+            env.define(name, klass)
+
+        return class_
+
+    def visit_Expression(self, stmt: Expression) -> Code:
+        expression = self.visit(stmt.expression)
+
+        def expression_(env):
+            expression(env)
+
+        return expression_
+
+    def visit_Function(self, stmt: Function) -> Code:
+        name = stmt.name.lexeme
+        body = self.compile(stmt.body)
+
+        def function(env):
+            env.define(name, CompiledFunction(stmt, body, env))
+
+        return function
+
+    def visit_If(self, stmt: If) -> Code:
+        condition = self.visit(stmt.condition)
+        then_branch = self.visit(stmt.then_branch)
+        if stmt.else_branch is None:
+            def if_(env):
+                if condition(env):
+                    return then_branch(env)
+                return None
+        else:
+            else_branch = self.visit(stmt.else_branch)
+
+            def if_(env):
+                if condition(env):
+                    return then_branch(env)
+                return else_branch(env)
+        return if_
+
+    def visit_Print(self, stmt: Print) -> Code:
+        expression = self.visit(stmt.expression)
+        runtime = self.runtime
+
+        def print_(env):
+            print(Literal(expression(env)), file=runtime.interpreter.stdout)
+
+        return print_
+
+    def visit_Return(self, stmt: Return) -> Code:
+        if stmt.tail_call:
+            return self.tail_call(stmt.value)    # type: ignore
+        value = self.visit(stmt.value) if stmt.value is not None else None
+
+        def return_(env):
+            return ReturnValue(value(env) if value is not None else None)
+
+        return return_
+
+    def tail_call(self, expr: Call) -> Code:
+        argument_codes = [self.visit(arg) for arg in expr.arguments]
+        count = len(argument_codes)
+        paren = expr.paren
+        runtime = self.runtime
+        if type(expr.callee) is Get:
+            get = expr.callee
+            object = self.visit(get.object)
+            name = get.name
+            lookup_member = self.interpreter.lookup_member
+
+            def callee_and_closure(env):
+                instance = object(env)
+                if not isinstance(instance, LoxInstance):
+                    raise RunError('Only instances have properties.', name)
+                member = lookup_member(get, instance)
+                if type(member) is int:
+                    return instance.fields[member], None
+                return member, Environment(member.closure, [instance])
+        else:
+            callee_code = self.visit(expr.callee)
+
+            def callee_and_closure(env):
+                return callee_code(env), None
+
+        def tail_call(env):
+            callee, closure = callee_and_closure(env)
+            arguments = [arg(env) for arg in argument_codes]
+            if isinstance(callee, CompiledFunction) and callee.arity == count:
+                return TailCall(callee, closure or callee.closure, arguments)
+            return ReturnValue(runtime.interpreter.call(callee, arguments, paren))
+
+        return tail_call
+
+    def visit_Var(self, stmt: Var) -> Code:
+        name = stmt.name.lexeme
+        initializer = self.visit(stmt.initializer) if stmt.initializer else None
+
+        def var(env):
+            env.define(name, initializer(env) if initializer is not None else None)
+
+        return var
+
+    def visit_While(self, stmt: While) -> Code:
+        condition = self.visit(stmt.condition)
+        body = self.visit(stmt.body)
+
+        def while_(env):
+            while condition(env):
+                if (completion := body(env)) is not None:
+                    return completion if completion is not BREAK else None
+            return None
+
+        return while_
+
+    def visit_Assign(self, expr: Assign) -> Code:
+        value = self.visit(expr.value)
+        name = expr.name
+        if expr.depth != GLOBAL:
+            distance, slot = expr.depth, expr.slot
+
+            def assign(env):
+                result = value(env)
+                env.ancestor(distance).values[slot] = result
+                return result
+        else:
+            runtime = self.runtime
+
+            def assign(env):
+                result = value(env)
+                runtime.globals.assign(name, result)
+                return result
+        return assign
+
+    def visit_Binary(self, expr: Binary) -> Code:
+        left = self.visit(expr.left)
+        right = self.visit(expr.right)
+        operator = expr.operator
+        check_numbers = self.interpreter.check_number_operands
+        check_numbers_or_strings = self.interpreter.check_number_or_string_operands
+        numbers = self.interpreter.numbers.types
+        divide = self.interpreter.numbers.divide
+        match operator.type:
+            case TokenType.MINUS:
+                def binary(env):
+                    a, b = left(env), right(env)
+                    if not (type(a) in numbers and type(b) in numbers):
+                        check_numbers(operator, a, b)
+                    try:
+                        return a - b
+                    except OverflowError:
+                        raise RunError('Numeric overflow.', operator) from None
+            case TokenType.PLUS:
+                def binary(env):
+                    a, b = left(env), right(env)
+                    if type(a) in numbers and type(b) in numbers:
+                        try:
+                            return a + b
+                        except OverflowError:
+                            raise RunError('Numeric overflow.', operator) from None
+                    check_numbers_or_strings(operator, a, b)
+                    return concat(a, b)
+            case TokenType.SLASH:
+                def binary(env):
+                    a, b = left(env), right(env)
+                    if not (type(a) in numbers and type(b) in numbers):
+                        check_numbers(operator, a, b)
+                    if b == 0:
+                        raise RunError('Division by zero.', operator)
+                    try:
+                        return divide(a, b)
+                    except OverflowError:
+                        raise RunError('Numeric overflow.', operator) from None
+            case TokenType.STAR:
+                def binary(env):
+                    a, b = left(env), right(env)
+                    if not (type(a) in numbers and type(b) in numbers):
+                        check_numbers(operator, a, b)
+                    try:
+                        return a * b
+                    except OverflowError:
+                        raise RunError('Numeric overflow.', operator) from None
+            case TokenType.GREATER:
+                def binary(env):
+                    a, b = left(env), right(env)
+                    if not (type(a) in numbers and type(b) in numbers):
+                        check_numbers(operator, a, b)
+                    return a > b
+            case TokenType.GREATER_EQUAL:
+                def binary(env):
+                    a, b = left(env), right(env)
+                    if not (type(a) in numbers and type(b) in numbers):
+                        check_numbers(operator, a, b)
+                    return a >= b
+            case TokenType.LESS:
+                def binary(env):
+                    a, b = left(env), right(env)
+                    if not (type(a) in numbers and type(b) in numbers):
+                        check_numbers(operator, a, b)
+                    return a < b
+            case TokenType.LESS_EQUAL:
+                def binary(env):
+                    a, b = left(env), right(env)
+                    if not (type(a) in numbers and type(b) in numbers):
+                        check_numbers(operator, a, b)
+                    return a <= b
+            case TokenType.BANG_EQUAL:
+                def binary(env):
+                    return left(env) != right(env)
+            case TokenType.EQUAL_EQUAL:
+                def binary(env):
+                    return left(env) == right(env)
+        return binary
+
+    def visit_Call(self, expr: Call) -> Code:
+        if type(expr.callee) is Get:
+            return self.invoke(expr, expr.callee)
+        callee_code = self.visit(expr.callee)
+        argument_codes = [self.visit(arg) for arg in expr.arguments]
+        count = len(argument_codes)
+        paren = expr.paren
+        runtime = self.runtime
+
+        def call(env):
+            callee = callee_code(env)
+            arguments = [arg(env) for arg in argument_codes]
+            if not isinstance(callee, Callable):
+                raise RunError('Can only call functions and classes.', paren)
+            if callee.arity != count:
+                raise RunError(f'Expected {callee.arity} arguments but got '
+                               f'{count}.', paren)
+            try:
+                return callee.call(runtime.interpreter, arguments)
+            except NativeError as err:
+                raise RunError(str(err), paren) from None
+
+        return call
+
+    def invoke(self, expr: Call, get: Get) -> Code:
+        object = self.visit(get.object)
+        argument_codes = [self.visit(arg) for arg in expr.arguments]
+        count = len(argument_codes)
+        name = get.name
+        paren = expr.paren
+        runtime = self.runtime
+        lookup_member = self.interpreter.lookup_member
+
+        def invoke(env):
+            instance = object(env)
+            if not isinstance(instance, LoxInstance):
+                raise RunError('Only instances have properties.', name)
+            member = lookup_member(get, instance)
+            arguments = [arg(env) for arg in argument_codes]
+            if type(member) is int:
+                return runtime.interpreter.call(instance.fields[member], arguments,
+                                                paren)
+            if member.arity != count:
+                runtime.interpreter.call(member, arguments, paren)
+            return member.call_bound(runtime.interpreter, instance, arguments)
+
+        return invoke
+
+    def visit_Get(self, expr: Get) -> Code:
+        object = self.visit(expr.object)
+        name = expr.name
+        lookup_member = self.interpreter.lookup_member
+
+        def get(env):
+            instance = object(env)
+            if not isinstance(instance, LoxInstance):
+                raise RunError('Only instances have properties.', name)
+            return instance.get_member(lookup_member(expr, instance))
+
+        return get
+
+    def visit_Grouping(self, expr: Grouping) -> Code:
+        return self.visit(expr.expression)
+
+    def visit_Literal(self, expr: Literal) -> Code:
+        value = expr.value
+
+        def literal(env):
+            return value
+
+        return literal
+
+    def visit_Logical(self, expr: Logical) -> Code:
+        left = self.visit(expr.left)
+        right = self.visit(expr.right)
+        if expr.operator.type == TokenType.OR:
+            def logical(env):
+                return left(env) or right(env)
+        else:
+            def logical(env):
+                return left(env) and right(env)
+        return logical
+
+    def visit_Unary(self, expr: Unary) -> Code:
+        right = self.visit(expr.right)
+        operator = expr.operator
+        check_numbers = self.interpreter.check_number_operands
+        match operator.type:
+            case TokenType.MINUS:
+                def unary(env):
+                    value = right(env)
+                    check_numbers(operator, value)
+                    return -value
+            case TokenType.BANG:
+                def unary(env):
+                    return not right(env)
+        return unary
+
+    def visit_Set(self, expr: Set) -> Code:
+        object = self.visit(expr.object)
+        value = self.visit(expr.value)
+        name = expr.name
+        max_entries = self.interpreter.max_cache_entries
+
+        def set(env):
+            instance = object(env)
+            if not isinstance(instance, LoxInstance):
+                raise RunError('Only instances have properties.', name)
+            result = value(env)
+            shape = instance.shape
+            cache = expr.cache
+            if cache is None or (target := cache.get(shape)) is None:
+                target = shape.store_target(name)
+                if cache is None:
+                    expr.cache = {shape: target}
+                elif len(cache) < max_entries:
+                    cache[shape] = target
+            instance.store(target, result)
+
+        return set
+
+    def visit_Super(self, expr: Super) -> Code:
+        distance, slot = expr.depth, expr.slot
+        method_name = expr.method
+
+        def super_(env):
+            superclass: LoxClass = env.get_at(distance, slot)
+            instance: LoxInstance = env.get_at(distance - 1, 0)
+            method = superclass.find_method(method_name.lexeme)
+            if not method:
+                raise RunError(f"Undefined property '{method_name.lexeme}'.",
+                               method_name)
+            return method.bind(instance)
+
+        return super_
+
+    def visit_This(self, expr: This) -> Code:
+        return self.variable(expr.keyword, expr)
+
+    def visit_Variable(self, expr: Variable) -> Code:
+        return self.variable(expr.name, expr)
+
+    def variable(self, name: Token, expr: This|Variable) -> Code:
+        if expr.depth == GLOBAL:
+            runtime = self.runtime
+
+            def variable(env):
+                return runtime.globals.get(name)
+        else:
+            distance, slot = expr.depth, expr.slot
+            if distance == 0:
+                def variable(env):
+                    return env.values[slot]
+            elif distance == 1:
+                def variable(env):
+                    return env.enclosing.values[slot]
+            else:
+                def variable(env):
+                    return env.ancestor(distance).values[slot]
+        return variable
@@ -0,0 +1,386 @@
+from dataclasses import dataclass, field
+from typing import Literal as LiteralType
+
+from .chunk import BytecodeFunction, OpCode
+from .exceptions import LoxError
+from .expressions import (Assign, Binary, Call, Get, Grouping, Literal, Logical,
+                          Set, Super, This, Unary, Variable)
+from .statements import (Block, Break, Class, Expression, Function, If, Print, Return,
+                         Stmt, Var, While)
+from .token import Token, TokenType
+from .types import LoxType
+from .visitor import Visitor
+
+
+FunctionKind = LiteralType['script', 'function', 'method', 'initializer']
+
+
+class CompileError(LoxError):
+    pass
+
+
+@dataclass
+class Local:
+    name: str
+    depth: int
+    is_captured: bool = False
+
+
+@dataclass
+class Loop:
+    scope_depth: int
+    breaks: list[int] = field(default_factory=list)
+
+
+class FunctionState:
+
+    def __init__(self, enclosing: 'FunctionState|None', function: BytecodeFunction,
+                 kind: FunctionKind):
+        self.enclosing = enclosing
+        self.function = function
+        self.kind = kind
+        # Slot zero contains the called function or, with methods, the instance.
+        receiver = 'this' if kind in ('method', 'initializer') else ''
+        self.locals: list[Local] = [Local(receiver, 0)]
+        self.upvalues: list[tuple[bool, int]] = []
+        self.scope_depth = 0
+        self.loops: list[Loop] = []
+
+
+class Compiler(Visitor):
+    """Compiles resolved statements to bytecode executed by the `VM`.
+
+    The top-level code is compiled to a `BytecodeFunction` named `''`.
+    Local variables live in stack slots and variables captured by closures
+    are accessed via upvalues.
+    """
+    binary_operators = {
+        TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+        TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+        TokenType.GREATER: OpCode.GREATER,
+        TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+        TokenType.LESS: OpCode.LESS,
+        TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+        TokenType.PLUS: OpCode.ADD,
+        TokenType.MINUS: OpCode.SUBTRACT,
+        TokenType.STAR: OpCode.MULTIPLY,
+        TokenType.SLASH: OpCode.DIVIDE
+    }
+
+    def __init__(self):
+        self.state = FunctionState(None, BytecodeFunction(''), 'script')
+        self.line = 1
+
+    def compile(self, statements: list[Stmt]) -> BytecodeFunction:
+        for stmt in statements:
+            self.visit(stmt)
+        return self.end_function()
+
+    def visit_Block(self, stmt: Block):
+        self.begin_scope()
+        for st in stmt.statements:
+            self.visit(st)
+        self.end_scope()
+
+    def visit_Break(self, stmt: Break):
+        self.line = stmt.keyword.line
+        loop = self.state.loops[-1]
+        self.discard_locals(loop.scope_depth)
+        loop.breaks.append(self.emit_jump(OpCode.JUMP))
+
+    def visit_Class(self, stmt: Class):
+        self.line = stmt.name.line
+        is_local = self.state.scope_depth > 0
+        if is_local:
+            self.emit(OpCode.NIL)
+            self.add_local(stmt.name)
+            slot = len(self.state.locals) - 1
+        if stmt.superclass is not None:
+            self.begin_scope()
+            self.visit(stmt.superclass)
+            self.state.locals.append(Local('super', self.state.scope_depth))
+        for method in stmt.methods:
+            self.function(method, 'initializer' if method.is_init else 'method')
+        self.line = (stmt.superclass or stmt).name.line
+        self.emit(OpCode.CLASS, *self.u16(self.make_constant(stmt.name.lexeme)),
+                  len(stmt.methods), stmt.superclass is not None)
+        if is_local:
+            self.emit(OpCode.SET_LOCAL, slot)
+            self.emit(OpCode.POP)
+        else:
+            self.emit_global(OpCode.DEFINE_GLOBAL, stmt.name)
+        if stmt.superclass is not None:
+            self.end_scope()
+
+    def visit_Expression(self, stmt: Expression):
+        self.visit(stmt.expression)
+        self.emit(OpCode.POP)
+
+    def visit_Function(self, stmt: Function):
+        if self.state.scope_depth > 0:
+            self.add_local(stmt.name)
+            self.function(stmt, 'function')
+        else:
+            self.function(stmt, 'function')
+            self.emit_global(OpCode.DEFINE_GLOBAL, stmt.name)
+
+    def visit_If(self, stmt: If):
+        self.visit(stmt.condition)
+        then_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        self.emit(OpCode.POP)
+        self.visit(stmt.then_branch)
+        else_jump = self.emit_jump(OpCode.JUMP)
+        self.patch_jump(then_jump)
+        self.emit(OpCode.POP)
+        if stmt.else_branch is not None:
+            self.visit(stmt.else_branch)
+        self.patch_jump(else_jump)
+
+    def visit_Print(self, stmt: Print):
+        self.visit(stmt.expression)
+        self.emit(OpCode.PRINT)
+
+    def visit_Return(self, stmt: Return):
+        self.line = stmt.keyword.line
+        if stmt.tail_call:
+            self.tail_call(stmt.value)    # type: ignore
+        elif stmt.value is not None:
+            self.visit(stmt.value)
+            self.emit(OpCode.RETURN)
+        else:
+            self.emit_return()
+
+    def visit_Var(self, stmt: Var):
+        if stmt.initializer is not None:
+            self.visit(stmt.initializer)
+        else:
+            self.emit(OpCode.NIL)
+        if self.state.scope_depth > 0:
+            self.add_local(stmt.name)
+        else:
+            self.emit_global(OpCode.DEFINE_GLOBAL, stmt.name)
+
+    def visit_While(self, stmt: While):
+        loop_start = len(self.chunk.code)
+        self.visit(stmt.condition)
+        exit_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        self.emit(OpCode.POP)
+        self.state.loops.append(Loop(self.state.scope_depth))
+        self.visit(stmt.body)
+        self.emit_loop(loop_start)
+        self.patch_jump(exit_jump)
+        self.emit(OpCode.POP)
+        for jump in self.state.loops.pop().breaks:
+            self.patch_jump(jump)
+
+    def visit_Assign(self, expr: Assign):
+        self.visit(expr.value)
+        self.line = expr.name.line
+        if (slot := self.resolve_local(self.state, expr.name.lexeme)) >= 0:
+            self.emit(OpCode.SET_LOCAL, slot)
+        elif (index := self.resolve_upvalue(self.state, expr.name.lexeme)) >= 0:
+            self.emit(OpCode.SET_UPVALUE, index)
+        else:
+            self.emit_global(OpCode.SET_GLOBAL, expr.name)
+
+    def visit_Binary(self, expr: Binary):
+        self.visit(expr.left)
+        self.visit(expr.right)
+        self.line = expr.operator.line
+        self.emit(self.binary_operators[expr.operator.type])
+
+    def visit_Call(self, expr: Call):
+        self.visit(expr.callee)
+        for arg in expr.arguments:
+            self.visit(arg)
+        self.line = expr.paren.line
+        self.emit(OpCode.CALL, len(expr.arguments))
+
+    def tail_call(self, expr: Call):
+        # `RETURN` is needed if the callee is not a Lox function.
+        self.visit(expr.callee)
+        for arg in expr.arguments:
+            self.visit(arg)
+        self.line = expr.paren.line
+        self.emit(OpCode.TAIL_CALL, len(expr.arguments))
+        self.emit(OpCode.RETURN)
+
+    def visit_Get(self, expr: Get):
+        self.visit(expr.object)
+        self.line = expr.name.line
+        self.emit(OpCode.GET_PROPERTY, *self.u16(self.make_constant(expr.name)))
+
+    def visit_Grouping(self, expr: Grouping):
+        self.visit(expr.expression)
+
+    def visit_Literal(self, expr: Literal):
+        if expr.value is None:
+            self.emit(OpCode.NIL)
+        elif expr.value is True:
+            self.emit(OpCode.TRUE)
+        elif expr.value is False:
+            self.emit(OpCode.FALSE)
+        else:
+            self.emit(OpCode.CONSTANT, *self.u16(self.make_constant(expr.value)))
+
+    def visit_Logical(self, expr: Logical):
+        self.visit(expr.left)
+        if expr.operator.type == TokenType.AND:
+            end_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        else:
+            else_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+            end_jump = self.emit_jump(OpCode.JUMP)
+            self.patch_jump(else_jump)
+        self.emit(OpCode.POP)
+        self.visit(expr.right)
+        self.patch_jump(end_jump)
+
+    def visit_Set(self, expr: Set):
+        self.visit(expr.object)
+        self.visit(expr.value)
+        self.line = expr.name.line
+        self.emit(OpCode.SET_PROPERTY, *self.u16(self.make_constant(expr.name)))
+
+    def visit_Super(self, expr: Super):
+        self.named_variable(expr.keyword, 'this')
+        self.named_variable(expr.keyword, 'super')
+        self.line = expr.method.line
+        self.emit(OpCode.GET_SUPER, *self.u16(self.make_constant(expr.method)))
+
+    def visit_This(self, expr: This):
+        self.named_variable(expr.keyword, 'this')
+
+    def visit_Unary(self, expr: Unary):
+        self.visit(expr.right)
+        self.line = expr.operator.line
+        if expr.operator.type == TokenType.MINUS:
+            self.emit(OpCode.NEGATE)
+        else:
+            self.emit(OpCode.NOT)
+
+    def visit_Variable(self, expr: Variable):
+        self.named_variable(expr.name, expr.name.lexeme)
+
+    def named_variable(self, token: Token, name: str):
+        self.line = token.line
+        if (slot := self.resolve_local(self.state, name)) >= 0:
+            self.emit(OpCode.GET_LOCAL, slot)
+        elif (index := self.resolve_upvalue(self.state, name)) >= 0:
+            self.emit(OpCode.GET_UPVALUE, index)
+        else:
+            self.emit_global(OpCode.GET_GLOBAL, token)
+
+    def function(self, stmt: Function, kind: FunctionKind):
+        self.line = stmt.name.line
+        function = BytecodeFunction(stmt.name.lexeme, len(stmt.params))
+        self.state = FunctionState(self.state, function, kind)
+        self.begin_scope()
+        for param in stmt.params:
+            self.add_local(param)
+        for st in stmt.body:
+            self.visit(st)
+        upvalues = self.state.upvalues
+        self.end_function()
+        self.emit(OpCode.CLOSURE, *self.u16(self.make_constant(function)))
+        for is_local, index in upvalues:
+            self.emit(is_local, index)
+
+    def end_function(self) -> BytecodeFunction:
+        self.emit_return()
+        function = self.state.function
+        function.upvalue_count = len(self.state.upvalues)
+        function.chunk.freeze()
+        if self.state.enclosing is not None:
+            self.state = self.state.enclosing
+        return function
+
+    def begin_scope(self):
+        self.state.scope_depth += 1
+
+    def end_scope(self):
+        self.discard_locals(self.state.scope_depth - 1)
+        self.state.scope_depth -= 1
+        while self.state.locals and self.state.locals[-1].depth > self.state.scope_depth:
+            self.state.locals.pop()
+
+    def discard_locals(self, depth: int):
+        for local in reversed(self.state.locals):
+            if local.depth <= depth:
+                break
+            self.emit(OpCode.CLOSE_UPVALUE if local.is_captured else OpCode.POP)
+
+    def add_local(self, name: Token):
+        if len(self.state.locals) == 256:
+            raise CompileError('Too many local variables in function.', name)
+        self.state.locals.append(Local(name.lexeme, self.state.scope_depth))
+
+    def resolve_local(self, state: FunctionState, name: str) -> int:
+        for slot in range(len(state.locals) - 1, -1, -1):
+            if state.locals[slot].name == name:
+                return slot
+        return -1
+
+    def resolve_upvalue(self, state: FunctionState, name: str) -> int:
+        if state.enclosing is None:
+            return -1
+        if (local := self.resolve_local(state.enclosing, name)) >= 0:
+            state.enclosing.locals[local].is_captured = True
+            return self.add_upvalue(state, True, local)
+        if (upvalue := self.resolve_upvalue(state.enclosing, name)) >= 0:
+            return self.add_upvalue(state, False, upvalue)
+        return -1
+
+    def add_upvalue(self, state: FunctionState, is_local: bool, index: int) -> int:
+        if (is_local, index) in state.upvalues:
+            return state.upvalues.index((is_local, index))
+        if len(state.upvalues) == 256:
+            raise CompileError('Too many closure variables in function.',
+                               Token(TokenType.IDENTIFIER, '', None, self.line))
+        state.upvalues.append((is_local, index))
+        return len(state.upvalues) - 1
+
+    @property
+    def chunk(self):
+        return self.state.function.chunk
+
+    def emit(self, *bytes: int):
+        for byte in bytes:
+            self.chunk.write(byte, self.line)
+
+    def emit_global(self, op: OpCode, name: Token):
+        self.emit(op, *self.u16(self.make_constant(name.lexeme)))
+
+    def emit_return(self):
+        if self.state.kind == 'initializer':
+            self.emit(OpCode.GET_LOCAL, 0)
+        else:
+            self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+
+    def emit_jump(self, op: OpCode) -> int:
+        self.emit(op, 0xff, 0xff)
+        return len(self.chunk.code) - 2
+
+    def patch_jump(self, offset: int):
+        jump = len(self.chunk.code) - offset - 2
+        if jump > 0xffff:
+            raise CompileError('Too much code to jump over.',
+                               Token(TokenType.IDENTIFIER, '', None, self.line))
+        self.chunk.code[offset:offset+2] = bytes(self.u16(jump))
+
+    def emit_loop(self, loop_start: int):
+        offset = len(self.chunk.code) - loop_start + 3
+        if offset > 0xffff:
+            raise CompileError('Loop body too large.',
+                               Token(TokenType.IDENTIFIER, '', None, self.line))
+        self.emit(OpCode.LOOP, *self.u16(offset))
+
+    def make_constant(self, value: 'LoxType|Token|BytecodeFunction') -> int:
+        index = self.chunk.add_constant(value)
+        if index > 0xffff:
+            raise CompileError('Too many constants in one chunk.',
+                               Token(TokenType.IDENTIFIER, '', None, self.line))
+        return index
+
+    def u16(self, value: int) -> tuple[int, int]:
+        return value >> 8, value & 0xff
@@ -0,0 +1,41 @@
+"""Signals for statements that do not complete normally.
+
+Executing a statement returns `None` when it completes normally. `return`
+and `break` statements return `ReturnValue` and `BREAK`, respectively, and
+enclosing statements pass them on until a function or a loop handles them.
+`return` statements returning a call to a Lox function return `TailCall`
+and the returning function runs the called function in its place.
+"""
+from typing import TYPE_CHECKING
+
+from .types import LoxType
+
+if TYPE_CHECKING:
+    from .environment import Environment, GlobalEnvironment
+    from .functions import LoxFunction
+
+
+class ReturnValue:
+    __slots__ = ('value',)
+
+    def __init__(self, value: LoxType):
+        self.value = value
+
+
+class TailCall:
+    __slots__ = ('function', 'closure', 'arguments')
+
+    def __init__(self, function: 'LoxFunction',
+                 closure: 'Environment|GlobalEnvironment', arguments: list[LoxType]):
+        self.function = function
+        self.closure = closure
+        self.arguments = arguments
+
+
+class BreakLoop:
+    __slots__ = ()
+
+
+BREAK = BreakLoop()
+
+Completion = ReturnValue|TailCall|BreakLoop|None
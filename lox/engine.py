@@ -0,0 +1,32 @@
+import typing
+from typing import TYPE_CHECKING, Protocol
+
+from .exceptions import LoxError
+from .numeric import Numbers
+from .statements import Stmt
+from .types import LoxType
+
+if TYPE_CHECKING:
+    from .functions import Callable
+
+
+class Engine(Protocol):
+    """Interface of execution engines listed in `Lox.engines`.
+
+    Callables get the engine calling them as an argument. Native functions
+    calling Lox functions must use `call_nested`, because how Lox functions
+    are called depends on the engine.
+    """
+    numbers: Numbers
+    # Where `print` writes. `None` means `sys.stdout`.
+    stdout: typing.TextIO|None
+
+    def __init__(self, error_reporter: typing.Callable[[LoxError], None],
+                 numbers: Numbers = ...):
+        ...
+
+    def interpret(self, statements: list[Stmt]):
+        ...
+
+    def call_nested(self, callee: 'Callable', arguments: list[LoxType]) -> LoxType:
+        ...
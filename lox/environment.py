@@ -5,41 +5,53 @@ from .token import Token
 
 
 class Environment:
+    """Local variables of one scope.
 
-    def __init__(self, enclosing: 'Environment|None' = None,
-                 initial: dict[str, Any]|None = None):
-        self.values: dict[str, Any] = initial or {}
+    Variables are stored in a list and accessed by slot indices assigned by
+    `Resolver`. Slots are assigned in declaration order, so defining a
+    variable simply appends its value.
+    """
+    __slots__ = ('values', 'enclosing')
+
+    def __init__(self, enclosing: 'Environment|GlobalEnvironment',
+                 values: list[Any]|None = None):
+        self.values = values if values is not None else []
         self.enclosing = enclosing
 
+    def define(self, name: str, value: Any):
+        self.values.append(value)
+
+    def get_at(self, distance: int, slot: int) -> Any:
+        return self.ancestor(distance).values[slot]
+
+    def assign_at(self, distance: int, slot: int, value: Any):
+        self.ancestor(distance).values[slot] = value
+
+    def ancestor(self, distance: int) -> 'Environment':
+        environment = self
+        while distance:
+            environment = environment.enclosing    # type: ignore
+            distance -= 1
+        return environment
+
+
+class GlobalEnvironment:
+    """Global variables. Accessed by name because they are late bound."""
+    __slots__ = ('values',)
+
+    def __init__(self, initial: dict[str, Any]|None = None):
+        self.values: dict[str, Any] = initial or {}
+
     def define(self, name: str, value: Any):
         self.values[name] = value
 
     def assign(self, name: Token, value: Any):
-        if name.lexeme in self.values:
-            self.values[name.lexeme] = value
-        elif self.enclosing is not None:
-            self.enclosing.assign(name, value)
-        else:
+        if name.lexeme not in self.values:
             raise RunError(f"Undefined variable '{name.lexeme}'.", name)
+        self.values[name.lexeme] = value
 
     def get(self, name: Token) -> Any:
-        if name.lexeme in self.values:
+        try:
             return self.values[name.lexeme]
-        elif self.enclosing is not None:
-            return self.enclosing.get(name)
-        else:
-            raise RunError(f"Undefined variable '{name.lexeme}'.", name)
-
-    def get_at(self, distance: int, name: str) -> Any:
-        environment = self.ancestor(distance)
-        return environment.values[name]
-
-    def assign_at(self, distance: int, name: str, value: Any):
-        self.ancestor(distance).values[name] = value
-
-    def ancestor(self, distance: int) -> 'Environment':
-        environment = self
-        for _ in range(distance):
-            assert environment.enclosing is not None    # Make mypy happy.
-            environment = environment.enclosing
-        return environment
+        except KeyError:
+            raise RunError(f"Undefined variable '{name.lexeme}'.", name) from None
@@ -16,14 +16,16 @@ class RunError(LoxError):
     pass
 
 
-class BreakControl(LoxError):
+class NativeError(Exception):
+    """Raised by native functions on invalid arguments.
 
-    def __init__(self, keyword: Token):
-        super().__init__("'break' outside loop.", keyword)
+    Reported as `RunError` at the call site.
+    """
 
 
-class ReturnControl(LoxError):
+class CompilationFailed(Exception):
+    """Raised by `program.compile` if source code has errors."""
 
-    def __init__(self, value, keyword: Token):
-        super().__init__("'return' outside function.", keyword)
-        self.value = value
+    def __init__(self, errors: list[str]):
+        super().__init__('\n'.join(errors))
+        self.errors = errors
@@ -1,48 +1,62 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
 from .token import Token
 from .types import LoxType
 
+if TYPE_CHECKING:
+    from .classes import Shape
+    from .functions import LoxFunction
 
-@dataclass(eq=False)
+
+# Depth of variables not resolved to be local.
+GLOBAL = -1
+
+
+@dataclass(eq=False, slots=True)
 class Expr:
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Assign(Expr):
     name: Token
     value: Expr
+    # Set by `Resolver` for local variables.
+    depth: int = field(default=GLOBAL, repr=False)
+    slot: int = field(default=0, repr=False)
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Binary(Expr):
     left: Expr
     operator: Token
     right: Expr
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Call(Expr):
     callee: Expr
     paren: Token
     arguments: list[Expr]
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Get(Expr):
     object: Expr
     name: Token
+    # Inline cache mapping shapes to field indices or methods.
+    cache: 'dict[Shape, int|LoxFunction]|None' = field(default=None, repr=False)
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Grouping(Expr):
     expression: Expr
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Literal(Expr):
     value: LoxType
 
@@ -51,43 +65,57 @@ class Literal(Expr):
             return 'nil'
         if isinstance(self.value, bool):
             return 'true' if self.value else 'false'
+        if isinstance(self.value, float):
+            text = repr(self.value)
+            return text[:-2] if text.endswith('.0') else text
         return str(self.value)
 
     def __bool__(self):
         return self.value is not None and self.value is not False
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Logical(Expr):
     left: Expr
     operator: Token
     right: Expr
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Set(Expr):
     object: Expr
     name: Token
     value: Expr
+    # Inline cache mapping shapes to field indices or shapes after adding field.
+    cache: 'dict[Shape, int|Shape]|None' = field(default=None, repr=False)
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Super(Expr):
     keyword: Token
     method: Token
+    # Set by `Resolver` for local variables.
+    depth: int = field(default=GLOBAL, repr=False)
+    slot: int = field(default=0, repr=False)
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class This(Expr):
     keyword: Token
+    # Set by `Resolver` for local variables.
+    depth: int = field(default=GLOBAL, repr=False)
+    slot: int = field(default=0, repr=False)
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Unary(Expr):
     operator: Token
     right: Expr
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Variable(Expr):
     name: Token
+    # Set by `Resolver` for local variables.
+    depth: int = field(default=GLOBAL, repr=False)
+    slot: int = field(default=0, repr=False)
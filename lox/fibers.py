@@ -0,0 +1,214 @@
+from collections import deque
+from functools import cache
+from types import GeneratorType
+from typing import Any, Generator
+
+from .channels import LoxChannel
+from .classes import LoxClass
+from .environment import Environment, GlobalEnvironment
+from .exceptions import LoxError, NativeError, RunError
+from .expressions import Literal
+from .functions import Callable, EngineNativeFunction, LoxFunction, NativeFunction
+from .numeric import Numbers
+from .stackless import StacklessInterpreter
+from .statements import Stmt
+from .token import Token
+from .types import LoxType
+
+
+class Blocked:
+    __slots__ = ()
+
+
+# Returned by native functions that block the current fiber.
+BLOCKED = Blocked()
+
+
+class Fiber:
+    """Lightweight thread created with the `spawn` native function.
+
+    Has its own stack of generators and the interpreter state that the
+    generators depend on.
+    """
+    __slots__ = ('stack', 'environment', 'depth', 'result', 'paren')
+
+    def __init__(self, generator: Generator[Any, Any, Any],
+                 environment: Environment|GlobalEnvironment):
+        self.stack = [generator]
+        self.environment = environment
+        self.depth = 0
+        # Value to send to the fiber when it continues.
+        self.result: LoxType = None
+        # Token of the latest native function call, used when reporting deadlocks.
+        self.paren: Token|None = None
+
+
+class FiberInterpreter(StacklessInterpreter):
+    """Interpreter supporting fibers and channels.
+
+    Based on `StacklessInterpreter`, whose state is only the stack of
+    generators, the current environment and the call depth. Each fiber has
+    its own copy of them, and fibers are switched by swapping them. Ready
+    fibers run in round-robin order, each for `time_slice` statements or
+    until it finishes or blocks sending or receiving a value.
+
+    The program ends when all fibers have finished or are blocked. If the
+    main program is blocked, that is reported as a deadlock.
+    """
+    time_slice = 100
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.globals.values.update(fiber_functions(self.numbers))
+        self.ready: deque[Fiber] = deque()
+        self.current: Fiber|None = None
+        # Token of the native function call being executed.
+        self.paren: Token|None = None
+        # Number of active calls from native functions to Lox functions.
+        self.nested = 0
+
+    def interpret(self, statements: list[Stmt]):
+        try:
+            self.schedule(Fiber(self.execute_all(statements), self.globals))
+        except LoxError as err:
+            self.environment = self.globals
+            self.depth = 0
+            self.ready.clear()
+            self.error_reporter(err)
+
+    def execute_all(self, statements: list[Stmt]):
+        for stmt in statements:
+            yield stmt
+
+    def schedule(self, main: Fiber):
+        self.ready.append(main)
+        while self.ready:
+            fiber = self.current = self.ready.popleft()
+            self.environment, self.depth = fiber.environment, fiber.depth
+            preempted = self.run_slice(fiber)
+            fiber.environment, fiber.depth = self.environment, self.depth
+            if preempted:
+                self.ready.append(fiber)
+            elif fiber.stack:
+                fiber.paren = self.paren
+        self.current = None
+        if main.stack:
+            raise RunError('Deadlock, all fibers are blocked.',
+                           main.paren)    # type: ignore
+
+    def run_slice(self, fiber: Fiber) -> bool:
+        """Runs `fiber` until it finishes, blocks or its time slice ends.
+
+        Returns `True` if the time slice ended.
+        """
+        stack = fiber.stack
+        result, fiber.result = fiber.result, None
+        budget = self.time_slice
+        while stack:
+            try:
+                node = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+                continue
+            if node is BLOCKED:
+                return False
+            result = self.visit(node)
+            if type(result) is GeneratorType:
+                stack.append(result)
+                result = None
+            if isinstance(node, Stmt):
+                budget -= 1
+                if not budget:
+                    fiber.result = result
+                    return True
+        return False
+
+    def call_nested(self, callee: Callable, arguments: list[LoxType]) -> LoxType:
+        self.nested += 1
+        try:
+            return super().call_nested(callee, arguments)
+        finally:
+            self.nested -= 1
+
+    def call_value(self, callee: LoxType, arguments: list[LoxType], paren: Token|None,
+                   closure: Environment|GlobalEnvironment|None = None):
+        if isinstance(callee, (LoxFunction, LoxClass)):
+            return (yield from super().call_value(callee, arguments, paren, closure))
+        self.paren = paren
+        if (result := self.call(callee, arguments, paren)) is BLOCKED:    # type: ignore
+            result = yield BLOCKED
+        return result
+
+    def spawn(self, function: LoxType):
+        if not isinstance(function, Callable) or isinstance(function, LoxClass) \
+                or function.arity != 0:
+            raise NativeError(f'Expected a function without arguments, '
+                              f'got {Literal(function)}.')
+        self.ready.append(Fiber(self.call_value(function, [], self.paren), self.globals))
+
+    def send(self, channel: LoxChannel, value: LoxType) -> None|Blocked:
+        if channel.receivers:
+            receiver = channel.receivers.popleft()
+            receiver.result = value
+            self.ready.append(receiver)
+        elif len(channel.items) < channel.capacity:
+            channel.items.append(value)
+        else:
+            self.check_can_block()
+            channel.senders.append((self.current, value))    # type: ignore
+            return BLOCKED
+        return None
+
+    def receive(self, channel: LoxChannel) -> LoxType|Blocked:
+        if channel.items:
+            value = channel.items.popleft()
+            if channel.senders:
+                sender, sent = channel.senders.popleft()
+                channel.items.append(sent)
+                self.ready.append(sender)
+            return value
+        if channel.senders:
+            sender, value = channel.senders.popleft()
+            self.ready.append(sender)
+            return value
+        self.check_can_block()
+        channel.receivers.append(self.current)    # type: ignore
+        return BLOCKED
+
+    def check_can_block(self):
+        # Nested calls are run with `drive` that cannot switch fibers.
+        if self.nested:
+            raise NativeError('Cannot wait for a channel in a function called '
+                              'by a native function.')
+
+
+@cache
+def fiber_functions(numbers: Numbers) -> dict[str, NativeFunction]:
+
+    def check_channel(value: LoxType) -> LoxChannel:
+        if not isinstance(value, LoxChannel):
+            raise NativeError(f'Expected a channel, got {Literal(value)}.')
+        return value
+
+    def channel(capacity):
+        if type(capacity) not in numbers.types or capacity % 1 != 0 or capacity < 0:
+            raise NativeError(f'Channel capacity must be a non-negative integer, '
+                              f'got {Literal(capacity)}.')
+        return LoxChannel(int(capacity))
+
+    def spawn(interpreter: FiberInterpreter, function):
+        interpreter.spawn(function)
+
+    def send(interpreter: FiberInterpreter, channel, value):
+        return interpreter.send(check_channel(channel), value)
+
+    def receive(interpreter: FiberInterpreter, channel):
+        return interpreter.receive(check_channel(channel))
+
+    return {func.name: func for func in (
+        NativeFunction('channel', 1, channel),
+        EngineNativeFunction('spawn', 1, spawn),
+        EngineNativeFunction('send', 2, send),
+        EngineNativeFunction('receive', 1, receive),
+    )}
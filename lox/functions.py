@@ -1,13 +1,16 @@
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Coroutine, cast
 
-from .environment import Environment
-from .exceptions import ReturnControl
+from .completion import ReturnValue, TailCall
+from .environment import Environment, GlobalEnvironment
+from .exceptions import NativeError
+from .rope import Rope
 from .statements import Function
 from .types import LoxType
 
 if TYPE_CHECKING:
     from .classes import LoxInstance
+    from .engine import Engine
     from .interpreter import Interpreter
 
 
@@ -19,7 +22,7 @@ class Callable(ABC):
         ...
 
     @abstractmethod
-    def call(self, interpreter: 'Interpreter', arguments: list[LoxType]) -> LoxType:
+    def call(self, engine: 'Engine', arguments: list[LoxType]) -> LoxType:
         ...
 
     @abstractmethod
@@ -38,16 +41,45 @@ class NativeFunction(Callable):
     def arity(self) -> int:
         return self._arity
 
-    def call(self, interpreter: 'Interpreter', arguments: list[LoxType]) -> LoxType:
-        return self.func(*arguments)
+    def call(self, engine: 'Engine', arguments: list[LoxType]) -> LoxType:
+        return self.func(*[arg.flatten() if type(arg) is Rope else arg
+                           for arg in arguments])
 
     def __str__(self) -> str:
         return f'<fn {self.name}>'
 
 
+class EngineNativeFunction(NativeFunction):
+    """Native function getting the calling engine as its first argument.
+
+    Needed by functions calling Lox functions using `call_nested`.
+    """
+
+    def call(self, engine: 'Engine', arguments: list[LoxType]) -> LoxType:
+        return self.func(engine, *[arg.flatten() if type(arg) is Rope else arg
+                                   for arg in arguments])
+
+
+class AsyncNativeFunction(NativeFunction):
+    """Native function implemented as a coroutine function.
+
+    Can be called only by `AsyncInterpreter` that awaits the coroutine
+    returned by `call_async`.
+    """
+
+    def call(self, engine: 'Engine', arguments: list[LoxType]) -> LoxType:
+        raise NativeError(f"Async function '{self.name}' can be called only from Lox "
+                          f"code in async mode.")
+
+    def call_async(self, arguments: list[LoxType]) -> Coroutine[Any, Any, LoxType]:
+        return self.func(*[arg.flatten() if type(arg) is Rope else arg
+                           for arg in arguments])
+
+
 class LoxFunction(Callable):
 
-    def __init__(self, declaration: Function, closure: Environment,
+    def __init__(self, declaration: Function,
+                 closure: Environment|GlobalEnvironment,
                  is_method: bool = False):
         self.declaration = declaration
         self.closure = closure
@@ -61,21 +93,35 @@ class LoxFunction(Callable):
     def arity(self) -> int:
         return len(self.declaration.params)
 
-    def call(self, interpreter: 'Interpreter', arguments: list[LoxType]) -> LoxType:
-        params = [p.lexeme for p in self.declaration.params]
-        environment = Environment(self.closure, dict(zip(params, arguments)))
-        try:
-            interpreter.execute_block(self.declaration.body, environment)
-        except ReturnControl as ret:
-            return_value = ret.value
-        else:
-            return_value = None
-        if self.is_initializer:
-            return self.closure.get_at(0, 'this')
-        return return_value
+    def call(self, engine: 'Engine', arguments: list[LoxType]) -> LoxType:
+        # Lox functions are created and called only by interpreters.
+        return self.run(cast('Interpreter', engine), self.closure, arguments)
+
+    def call_bound(self, interpreter: 'Interpreter', instance: 'LoxInstance',
+                   arguments: list[LoxType]) -> LoxType:
+        """Calls method bound to `instance` without creating a bound method."""
+        return self.run(interpreter, Environment(self.closure, [instance]), arguments)
+
+    def run(self, interpreter: 'Interpreter', closure: Environment|GlobalEnvironment,
+            arguments: list[LoxType]) -> LoxType:
+        # Tail calls are run in this loop so that they use no Python stack.
+        function = self
+        while True:
+            environment = Environment(closure, arguments)
+            completion = interpreter.execute_block(function.declaration.body,
+                                                   environment)
+            if type(completion) is not TailCall:
+                break
+            function = completion.function
+            closure = completion.closure
+            arguments = completion.arguments
+        if function.is_initializer:
+            assert type(closure) is Environment    # Make mypy happy.
+            return closure.values[0]
+        return completion.value if type(completion) is ReturnValue else None
 
     def bind(self, instance: 'LoxInstance'):
-        environment = Environment(self.closure, {'this': instance})
+        environment = Environment(self.closure, [instance])
         return LoxFunction(self.declaration, environment, is_method=True)
 
     def __str__(self) -> str:
@@ -1,13 +1,15 @@
-from decimal import Decimal
-import time
 import typing
 
 from .classes import LoxClass, LoxInstance
-from .environment import Environment
-from .exceptions import BreakControl, LoxError, ReturnControl, RunError
-from .expressions import (Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical,
-                          Set, Super, This, Unary, Variable)
-from .functions import Callable, NativeFunction, LoxFunction
+from .completion import BREAK, Completion, ReturnValue, TailCall
+from .environment import Environment, GlobalEnvironment
+from .exceptions import LoxError, NativeError, RunError
+from .expressions import (GLOBAL, Assign, Binary, Call, Expr, Get, Grouping, Literal,
+                          Logical, Set, Super, This, Unary, Variable)
+from .functions import Callable, LoxFunction
+from .natives import native_functions
+from .numeric import NUMERIC_MODES, Numbers
+from .rope import Rope, concat
 from .statements import (Block, Break, Class, Expression, Function, If, Print, Return,
                          Stmt, Var, While)
 from .token import Token, TokenType
@@ -16,14 +18,17 @@ from .visitor import Visitor
 
 
 class Interpreter(Visitor):
-
-    def __init__(self, error_reporter: typing.Callable[[LoxError], None]):
-        native = {'clock': NativeFunction('clock', 0, time.time),
-                  'str': NativeFunction('str', 1, str),
-                  'type': NativeFunction('type', 1, type)}
-        self.globals = self.environment = Environment(initial=native)
-        self.locals: dict[Expr, int] = {}
+    # Inline caches having this many entries are considered megamorphic.
+    max_cache_entries = 4
+
+    def __init__(self, error_reporter: typing.Callable[[LoxError], None],
+                 numbers: Numbers = NUMERIC_MODES['decimal']):
+        self.numbers = numbers
+        self.globals = GlobalEnvironment(dict(native_functions(numbers)))
+        self.environment: Environment|GlobalEnvironment = self.globals
         self.error_reporter = error_reporter
+        # Where `print` writes. `None` means `sys.stdout`.
+        self.stdout: typing.TextIO|None = None
 
     def interpret(self, statements: list[Stmt]):
         try:
@@ -32,17 +37,17 @@ class Interpreter(Visitor):
         except LoxError as err:
             self.error_reporter(err)
 
-    def execute(self, stmt: Stmt):
-        stmt.accept(self)
-
-    def resolve(self, expr: Expr, depth: int):
-        self.locals[expr] = depth
+    def execute(self, stmt: Stmt) -> Completion:
+        return stmt.accept(self)
 
-    def execute_block(self, statements: list[Stmt], environment: Environment):
+    def execute_block(self, statements: list[Stmt],
+                      environment: Environment) -> Completion:
         previous, self.environment = self.environment, environment
         try:
             for stmt in statements:
-                self.execute(stmt)
+                if (completion := self.execute(stmt)) is not None:
+                    return completion
+            return None
         finally:
             self.environment = previous
 
@@ -50,10 +55,10 @@ class Interpreter(Visitor):
         return expr.accept(self)
 
     def visit_Block(self, stmt: Block):
-        self.execute_block(stmt.statements, Environment(self.environment))
+        return self.execute_block(stmt.statements, Environment(self.environment))
 
     def visit_Break(self, stmt: Break):
-        raise BreakControl(stmt.keyword)
+        return BREAK
 
     def visit_Class(self, stmt: Class):
         if stmt.superclass is not None:
@@ -62,16 +67,13 @@ class Interpreter(Visitor):
                 raise RunError('Superclass must be a class.', stmt.superclass.name)
         else:
             superclass = None
-        self.environment.define(stmt.name.lexeme, None)
+        closure = self.environment
         if superclass:
-            self.environment = Environment(self.environment, {'super': superclass})
-        methods = {meth.name.lexeme: LoxFunction(meth, self.environment, is_method=True)
+            closure = Environment(closure, [superclass])
+        methods = {meth.name.lexeme: LoxFunction(meth, closure, is_method=True)
                    for meth in stmt.methods}
         klass = LoxClass(stmt.name.lexeme, superclass, methods)
-        if superclass:
-            assert self.environment.enclosing is not None    # Make mypy happy.
-            self.environment = self.environment.enclosing
-        self.environment.assign(stmt.name, klass)
+        self.environment.define(stmt.name.lexeme, klass)
 
     def visit_Expression(self, stmt: Expression):
         self.evaluate(stmt.expression)
@@ -82,17 +84,20 @@ class Interpreter(Visitor):
 
     def visit_If(self, stmt: If):
         if self.evaluate(stmt.condition):
-            self.execute(stmt.then_branch)
-        elif stmt.else_branch is not None:
-            self.execute(stmt.else_branch)
+            return self.execute(stmt.then_branch)
+        if stmt.else_branch is not None:
+            return self.execute(stmt.else_branch)
+        return None
 
     def visit_Print(self, stmt: Print):
         value = self.evaluate(stmt.expression)
-        print(Literal(value))
+        print(Literal(value), file=self.stdout)
 
     def visit_Return(self, stmt: Return):
+        if stmt.tail_call:
+            return self.tail_call(stmt.value)    # type: ignore
         value = self.evaluate(stmt.value) if stmt.value is not None else None
-        raise ReturnControl(value, stmt.keyword)
+        return ReturnValue(value)
 
     def visit_Var(self, stmt: Var):
         value = self.evaluate(stmt.initializer) if stmt.initializer is not None else None
@@ -100,71 +105,138 @@ class Interpreter(Visitor):
 
     def visit_While(self, stmt: While):
         while self.evaluate(stmt.condition):
-            try:
-                self.execute(stmt.body)
-            except BreakControl:
-                break
+            if (completion := self.execute(stmt.body)) is not None:
+                return completion if completion is not BREAK else None
+        return None
 
     def visit_Assign(self, expr: Assign):
         value = self.evaluate(expr.value)
-        if expr in self.locals:
-            distance = self.locals[expr]
-            self.environment.assign_at(distance, expr.name.lexeme, value)
-        else:
+        if expr.depth == GLOBAL:
             self.globals.assign(expr.name, value)
+        else:
+            self.environment.assign_at(expr.depth, expr.slot, value)    # type: ignore
         return value
 
     def visit_Binary(self, expr: Binary):
-        left = self.evaluate(expr.left)
-        operator = expr.operator
-        right = self.evaluate(expr.right)
-        match operator.type:
-            case TokenType.MINUS:
-                self.check_number_operands(operator, left, right)
-                return left - right
-            case TokenType.PLUS:
-                self.check_number_or_string_operands(operator, left, right)
-                return left + right
-            case TokenType.SLASH:
-                self.check_number_operands(operator, left, right)
-                if right == 0:
-                    raise RunError('Division by zero.', operator)
-                return left / right
-            case TokenType.STAR:
-                self.check_number_operands(operator, left, right)
-                return left * right
-            case TokenType.GREATER:
-                self.check_number_operands(operator, left, right)
-                return left > right
-            case TokenType.GREATER_EQUAL:
-                self.check_number_operands(operator, left, right)
-                return left >= right
-            case TokenType.LESS:
-                self.check_number_operands(operator, left, right)
-                return left < right
-            case TokenType.LESS_EQUAL:
-                self.check_number_operands(operator, left, right)
-                return left <= right
-            case TokenType.BANG_EQUAL:
-                return left != right
-            case TokenType.EQUAL_EQUAL:
-                return left == right
+        return self.binary(expr.operator, self.evaluate(expr.left),
+                           self.evaluate(expr.right))
+
+    def binary(self, operator: Token, left: typing.Any, right: typing.Any):
+        try:
+            match operator.type:
+                case TokenType.MINUS:
+                    self.check_number_operands(operator, left, right)
+                    return left - right
+                case TokenType.PLUS:
+                    self.check_number_or_string_operands(operator, left, right)
+                    if type(left) in self.numbers.types:
+                        return left + right
+                    return concat(left, right)    # type: ignore
+                case TokenType.SLASH:
+                    self.check_number_operands(operator, left, right)
+                    if right == 0:
+                        raise RunError('Division by zero.', operator)
+                    return self.numbers.divide(left, right)
+                case TokenType.STAR:
+                    self.check_number_operands(operator, left, right)
+                    return left * right
+                case TokenType.GREATER:
+                    self.check_number_operands(operator, left, right)
+                    return left > right
+                case TokenType.GREATER_EQUAL:
+                    self.check_number_operands(operator, left, right)
+                    return left >= right
+                case TokenType.LESS:
+                    self.check_number_operands(operator, left, right)
+                    return left < right
+                case TokenType.LESS_EQUAL:
+                    self.check_number_operands(operator, left, right)
+                    return left <= right
+                case TokenType.BANG_EQUAL:
+                    return left != right
+                case TokenType.EQUAL_EQUAL:
+                    return left == right
+        except OverflowError:
+            # Mixing huge integers with floats in the int-float mode.
+            raise RunError('Numeric overflow.', operator) from None
 
     def visit_Call(self, expr: Call):
+        if type(expr.callee) is Get:
+            return self.invoke(expr, expr.callee)
         callee = self.evaluate(expr.callee)
         arguments = [self.evaluate(arg) for arg in expr.arguments]
+        return self.call(callee, arguments, expr.paren)
+
+    def invoke(self, expr: Call, get: Get):
+        """Calls `object.name(...)` without binding methods to instances."""
+        instance = self.evaluate(get.object)
+        if not isinstance(instance, LoxInstance):
+            raise RunError('Only instances have properties.', get.name)
+        member = self.lookup_member(get, instance)
+        if type(member) is int:
+            callee = instance.fields[member]
+            arguments = [self.evaluate(arg) for arg in expr.arguments]
+            return self.call(callee, arguments, expr.paren)
+        arguments = [self.evaluate(arg) for arg in expr.arguments]
+        if member.arity != len(arguments):    # type: ignore
+            self.call(member, arguments, expr.paren)    # Reports the error.
+        return member.call_bound(self, instance, arguments)    # type: ignore
+
+    def tail_call(self, expr: Call) -> Completion:
+        """Returns `TailCall` if `expr` calls a Lox function, otherwise calls it."""
+        closure = None
+        if type(expr.callee) is Get:
+            get = expr.callee
+            instance = self.evaluate(get.object)
+            if not isinstance(instance, LoxInstance):
+                raise RunError('Only instances have properties.', get.name)
+            member = self.lookup_member(get, instance)
+            if type(member) is int:
+                callee = instance.fields[member]
+            else:
+                callee = member
+                closure = Environment(member.closure, [instance])    # type: ignore
+        else:
+            callee = self.evaluate(expr.callee)
+        arguments = [self.evaluate(arg) for arg in expr.arguments]
+        if isinstance(callee, LoxFunction) and callee.arity == len(arguments):
+            return TailCall(callee, closure or callee.closure, arguments)
+        return ReturnValue(self.call(callee, arguments, expr.paren))
+
+    def call(self, callee: LoxType, arguments: list[LoxType], paren: Token):
         if not isinstance(callee, Callable):
-            raise RunError('Can only call functions and classes.', expr.paren)
+            raise RunError('Can only call functions and classes.', paren)
         if callee.arity != len(arguments):
             raise RunError(f'Expected {callee.arity} arguments but got '
-                               f'{len(arguments)}.', expr.paren)
+                           f'{len(arguments)}.', paren)
+        try:
+            return callee.call(self, arguments)
+        except NativeError as err:
+            raise RunError(str(err), paren) from None
+
+    def call_nested(self, callee: Callable, arguments: list[LoxType]) -> LoxType:
+        """Calls `callee` from Python code, for example, from a native function.
+
+        The caller must make sure that the number of arguments is correct.
+        """
         return callee.call(self, arguments)
 
     def visit_Get(self, expr: Get):
         instance = self.evaluate(expr.object)
         if not isinstance(instance, LoxInstance):
             raise RunError('Only instances have properties.', expr.name)
-        return instance.get(expr.name)
+        return instance.get_member(self.lookup_member(expr, instance))
+
+    def lookup_member(self, expr: Get, instance: LoxInstance) -> int|LoxFunction:
+        cache = expr.cache
+        if cache is not None and (member := cache.get(instance.shape)) is not None:
+            return member
+        member = instance.shape.lookup(expr.name)
+        if cache is None:
+            expr.cache = {instance.shape: member}
+        elif len(cache) < self.max_cache_entries:
+            cache[instance.shape] = member
+        return member
 
     def visit_Grouping(self, expr: Grouping):
         return self.evaluate(expr.expression)
@@ -192,13 +264,24 @@ class Interpreter(Visitor):
         instance = self.evaluate(expr.object)
         if not isinstance(instance, LoxInstance):
             raise RunError('Only instances have properties.', expr.name)
-        value = self.evaluate(expr.value)
-        instance.set(expr.name, value)
+        self.store_property(expr, instance, self.evaluate(expr.value))
+
+    def store_property(self, expr: Set, instance: LoxInstance, value: LoxType):
+        shape = instance.shape
+        cache = expr.cache
+        if cache is None or (target := cache.get(shape)) is None:
+            target = shape.store_target(expr.name)
+            if cache is None:
+                expr.cache = {shape: target}
+            elif len(cache) < self.max_cache_entries:
+                cache[shape] = target
+        instance.store(target, value)
 
     def visit_Super(self, expr: Super):
-        distance = self.locals[expr]
-        superclass: LoxClass = self.environment.get_at(distance, 'super')
-        instance: LoxInstance = self.environment.get_at(distance - 1, 'this')
+        distance = expr.depth
+        environment = self.environment
+        superclass: LoxClass = environment.get_at(distance, expr.slot)    # type: ignore
+        instance: LoxInstance = environment.get_at(distance - 1, 0)    # type: ignore
         method = superclass.find_method(expr.method.lexeme)
         if not method:
             raise RunError(f"Undefined property '{expr.method.lexeme}'.", expr.method)
@@ -210,20 +293,19 @@ class Interpreter(Visitor):
     def visit_Variable(self, expr: Variable):
         return self.look_up_variable(expr.name, expr)
 
-    def look_up_variable(self, name: Token, expr: Expr):
-        if expr in self.locals:
-            distance = self.locals[expr]
-            return self.environment.get_at(distance, name.lexeme)
-        return self.globals.get(name)
+    def look_up_variable(self, name: Token, expr: This|Variable):
+        if expr.depth == GLOBAL:
+            return self.globals.get(name)
+        return self.environment.get_at(expr.depth, expr.slot)    # type: ignore
 
     def check_number_operands(self, operator: Token, *operands: LoxType):
-        if not all(isinstance(o, Decimal) for o in operands):
+        if not all(type(o) in self.numbers.types for o in operands):
             raise RunError(f'Operands must be numbers, got {operands}.', operator)
 
     def check_number_or_string_operands(self, operator: Token, *operands: LoxType):
-        if all(isinstance(o, Decimal) for o in operands):
+        if all(type(o) in self.numbers.types for o in operands):
             return
-        if all(isinstance(o, str) for o in operands):
+        if all(isinstance(o, (str, Rope)) for o in operands):
             return
         raise RunError(f'Operands must be two numbers or two strings, got {operands}.',
                        operator)
@@ -0,0 +1,88 @@
+from reprlib import recursive_repr
+
+from .exceptions import NativeError
+from .expressions import Literal
+from .functions import NativeFunction
+from .numeric import Numbers
+from .types import LoxType
+
+
+class LoxList:
+    """Growable list created with the `list` native function.
+
+    Lists are compared by identity like instances.
+    """
+    __slots__ = ('items',)
+
+    def __init__(self, items: list[LoxType]|None = None):
+        self.items = items if items is not None else []
+
+    @recursive_repr('[...]')
+    def __str__(self) -> str:
+        return '[' + ', '.join(str(Literal(item)) for item in self.items) + ']'
+
+
+def list_functions(numbers: Numbers) -> dict[str, NativeFunction]:
+
+    def check_list(value: LoxType) -> list[LoxType]:
+        if not isinstance(value, LoxList):
+            raise NativeError(f'Expected a list, got {Literal(value)}.')
+        return value.items
+
+    def check_index(value: LoxType, size: int) -> int:
+        index = to_int(value)
+        if not 0 <= index < size:
+            raise NativeError(f'List index {index} out of range.')
+        return index
+
+    def to_int(value: LoxType) -> int:
+        if type(value) not in numbers.types or value % 1 != 0:    # type: ignore
+            raise NativeError(f'Expected an integer, got {Literal(value)}.')
+        return int(value)    # type: ignore
+
+    def push(lst, value):
+        check_list(lst).append(value)
+
+    def pop(lst):
+        items = check_list(lst)
+        if not items:
+            raise NativeError('Cannot pop from an empty list.')
+        return items.pop()
+
+    def get(lst, index):
+        items = check_list(lst)
+        return items[check_index(index, len(items))]
+
+    def set(lst, index, value):
+        items = check_list(lst)
+        items[check_index(index, len(items))] = value
+
+    def size(lst):
+        return numbers.from_int(len(check_list(lst)))
+
+    def slice(lst, start, end):
+        """Returns a new list. Indices work like in Python slicing."""
+        return LoxList(check_list(lst)[to_int(start):to_int(end)])
+
+    def extend(lst, other):
+        check_list(lst).extend(check_list(other))
+
+    def sort(lst):
+        items = check_list(lst)
+        if not (all(type(item) in numbers.types for item in items)
+                or all(type(item) is str for item in items)):
+            raise NativeError('Lists can be sorted only if they contain only '
+                              'numbers or only strings.')
+        items.sort()
+
+    return {func.name: func for func in (
+        NativeFunction('list', 0, LoxList),
+        NativeFunction('push', 2, push),
+        NativeFunction('pop', 1, pop),
+        NativeFunction('get', 2, get),
+        NativeFunction('set', 3, set),
+        NativeFunction('len', 1, size),
+        NativeFunction('slice', 3, slice),
+        NativeFunction('extend', 2, extend),
+        NativeFunction('sort', 1, sort),
+    )}
@@ -1,20 +1,65 @@
+import gc
 import sys
 from pathlib import Path
 
+from .astprinter import AstPrinter
+from .asynchronous import AsyncInterpreter
+from .cache import ScriptCache
+from .closurecompiler import ClosureInterpreter
+from .engine import Engine
 from .exceptions import LoxError
+from .fibers import FiberInterpreter
 from .interpreter import Interpreter
+from .numeric import NUMERIC_MODES
+from .optimizer import Optimizer
 from .parser import Parser
+from .profiler import Profiler
 from .resolver import Resolver
 from .scanner import Scanner
+from .stackless import StacklessInterpreter
+from .stats import StatsInterpreter
+from .statements import Stmt
 from .token import Token, TokenType
+from .vm import VM
 
 
 class Lox:
+    engines: dict[str, type[Engine]] = {
+        'interpreter': Interpreter,
+        'closures': ClosureInterpreter,
+        'stackless': StacklessInterpreter,
+        'async': AsyncInterpreter,
+        'fibers': FiberInterpreter,
+        'vm': VM
+    }
 
-    def __init__(self):
-        self.interpreter = Interpreter(self.runtime_error)
+    def __init__(self, engine: str = 'interpreter', numbers: str = 'decimal',
+                 optimize: bool = False, print_ast: bool = False,
+                 cache: bool = False, profile: bool = False, stats: bool = False,
+                 max_depth: int|None = None):
+        if stats and engine != 'interpreter':
+            raise ValueError('Statistics are only supported with the interpreter.')
+        self.numbers = NUMERIC_MODES[numbers]
+        engine_class = StatsInterpreter if stats else self.engines[engine]
+        self.interpreter = engine_class(self.runtime_error, self.numbers)
+        if max_depth is not None:
+            self.set_max_depth(max_depth)
+        self.optimize = optimize
+        self.print_ast = print_ast
+        self.cache = ScriptCache(numbers, optimize) if cache else None
+        self.profiler = Profiler.for_engine(self.interpreter) if profile else None
+        self.stats = self.interpreter.stats if stats else None    # type: ignore
         self.error_code = 0
 
+    def set_max_depth(self, max_depth: int):
+        if isinstance(self.interpreter, VM):
+            self.interpreter.max_frames = max_depth
+        elif isinstance(self.interpreter, StacklessInterpreter):
+            self.interpreter.max_depth = max_depth
+        else:
+            raise ValueError('Maximum call depth can only be set with the stackless, '
+                             'async and fiber interpreters and the VM.')
+
     def run_prompt(self):
         while True:
             try:
@@ -26,16 +71,49 @@ class Lox:
                 self.error_code = 0
         print()
 
-    def run_script(self, path: Path):
-        self.run(path.read_text())
+    def run_script(self, path: Path, freeze: bool = False):
+        """Runs a script and exits if it fails.
+
+        If `freeze` is true, objects alive after loading a cached script are
+        ignored by the garbage collector afterwards. It speeds up running
+        scripts having big syntax trees, but those objects are never freed,
+        so it is only meant for processes running one script.
+        """
+        source = path.read_text()
+        if not self.cache:
+            self.run(source)
+        elif (statements := self.cache.load(path, source)) is not None:
+            if freeze:
+                gc.freeze()
+            self.execute(statements)
+        elif (statements := self.compile(source)) is not None:
+            self.cache.save(path, source, statements)
+            self.execute(statements)
         if self.error_code:
             sys.exit(self.error_code)
 
     def run(self, source: str):
-        tokens = Scanner(source, self.scan_error).scan_tokens()
+        if (statements := self.compile(source)) is not None:
+            self.execute(statements)
+
+    def compile(self, source: str) -> list[Stmt]|None:
+        tokens = Scanner(source, self.scan_error, self.numbers).scan_tokens_iter()
         statements = Parser(tokens, self.parse_error).parse()
-        Resolver(self.interpreter, self.parse_error).resolve(statements)
-        if not self.error_code:
+        Resolver(self.parse_error).resolve(statements)
+        if self.error_code:
+            return None
+        if self.optimize:
+            statements = Optimizer(self.numbers).optimize(statements)
+        return statements
+
+    def execute(self, statements: list[Stmt]):
+        if self.print_ast:
+            for stmt in statements:
+                AstPrinter().print(stmt)
+        elif self.profiler:
+            with self.profiler:
+                self.interpreter.interpret(statements)
+        else:
             self.interpreter.interpret(statements)
 
     def scan_error(self, line: int, message: str):
@@ -49,7 +127,11 @@ class Lox:
         self.report(error.message, error.token.line, runtime_error=True)
 
     def report(self, message: str, line: int, where: str = '', runtime_error=False):
-        if where:
-            where = ' ' + where
-        print(f'[line {line}] Error{where}: {message}', file=sys.stderr)
+        print(format_error(message, line, where), file=sys.stderr)
         self.error_code = 70 if runtime_error else 65
+
+
+def format_error(message: str, line: int, where: str = '') -> str:
+    if where:
+        where = ' ' + where
+    return f'[line {line}] Error{where}: {message}'
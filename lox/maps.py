@@ -0,0 +1,92 @@
+from reprlib import recursive_repr
+
+from .exceptions import NativeError
+from .expressions import Literal
+from .functions import NativeFunction
+from .lists import LoxList
+from .numeric import Numbers
+from .types import LoxType
+
+
+class BoolKey:
+    """Map key representing a boolean.
+
+    Python booleans are equal to numbers 0 and 1, but in maps they must be
+    separate keys.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value: bool):
+        self.value = value
+
+
+TRUE_KEY = BoolKey(True)
+FALSE_KEY = BoolKey(False)
+
+
+class LoxMap:
+    """Hash map created with the `map` native function.
+
+    Keys can be strings, numbers, booleans and nil. Equal numbers are the
+    same key even if they are represented differently, for example, `1` and
+    `1.0`. Maps are compared by identity like instances.
+    """
+    __slots__ = ('items',)
+
+    def __init__(self):
+        self.items: dict[LoxType|BoolKey, LoxType] = {}
+
+    @recursive_repr('{...}')
+    def __str__(self) -> str:
+        return '{' + ', '.join(f'{Literal(from_key(key))}: {Literal(value)}'
+                               for key, value in self.items.items()) + '}'
+
+
+def from_key(key: LoxType|BoolKey) -> LoxType:
+    return key.value if type(key) is BoolKey else key    # type: ignore
+
+
+def map_functions(numbers: Numbers) -> dict[str, NativeFunction]:
+
+    def check_map(value: LoxType) -> dict[LoxType|BoolKey, LoxType]:
+        if not isinstance(value, LoxMap):
+            raise NativeError(f'Expected a map, got {Literal(value)}.')
+        return value.items
+
+    def to_key(value: LoxType) -> LoxType|BoolKey:
+        if value is True:
+            return TRUE_KEY
+        if value is False:
+            return FALSE_KEY
+        if value is None or type(value) is str or type(value) in numbers.types:
+            return value
+        raise NativeError(f'Map keys must be strings, numbers, booleans or nil, '
+                          f'got {Literal(value)}.')
+
+    def get(map, key):
+        return check_map(map).get(to_key(key))
+
+    def set(map, key, value):
+        check_map(map)[to_key(key)] = value
+
+    def has(map, key):
+        return to_key(key) in check_map(map)
+
+    def delete(map, key):
+        check_map(map).pop(to_key(key), None)
+
+    def keys(map):
+        return LoxList([from_key(key) for key in check_map(map)])
+
+    def size(map):
+        return numbers.from_int(len(check_map(map)))
+
+    return {func.name: func for func in (
+        NativeFunction('map', 0, LoxMap),
+        NativeFunction('get', 2, get),
+        NativeFunction('set', 3, set),
+        NativeFunction('has', 2, has),
+        NativeFunction('delete', 2, delete),
+        NativeFunction('keys', 1, keys),
+        NativeFunction('len', 1, size),
+    )}
@@ -0,0 +1,78 @@
+import time
+from functools import cache
+
+from .arrays import LoxArray, array_functions
+from .channels import LoxChannel
+from .classes import LoxClass, LoxInstance
+from .exceptions import NativeError
+from .expressions import Literal
+from .functions import Callable, NativeFunction
+from .lists import LoxList, list_functions
+from .maps import LoxMap, map_functions
+from .numeric import Numbers
+from .types import LoxType
+
+
+CONTAINER_NAMES = {LoxList: 'a list', LoxMap: 'a map', LoxArray: 'an array'}
+
+
+@cache
+def native_functions(numbers: Numbers) -> dict[str, NativeFunction]:
+    """Returns native functions. The returned dictionary must not be modified."""
+    containers = {LoxList: list_functions(numbers),
+                  LoxMap: map_functions(numbers),
+                  LoxArray: array_functions(numbers)}
+    by_name: dict[str, dict[type, NativeFunction]] = {}
+    for container_type, functions in containers.items():
+        for name, func in functions.items():
+            by_name.setdefault(name, {})[container_type] = func
+    return {'clock': NativeFunction('clock', 0,
+                                    lambda: numbers.from_float(time.time())),
+            'str': NativeFunction('str', 1, lambda value: str(Literal(value))),
+            'type': NativeFunction('type', 1, lambda value: type_name(value, numbers)),
+            **{name: container_function(functions) if len(functions) > 1
+               else functions.popitem()[1]
+               for name, functions in by_name.items()}}
+
+
+def container_function(functions: dict[type, NativeFunction]) -> NativeFunction:
+    """Combines functions having same name but working with different containers.
+
+    The type of the first argument decides which function is called.
+    """
+    names = [CONTAINER_NAMES[container_type] for container_type in functions]
+    expected = ', '.join(names[:-1]) + ' or ' + names[-1]
+    first = next(iter(functions.values()))
+
+    def func(container, *args):
+        if (function := functions.get(type(container))) is None:
+            raise NativeError(f'Expected {expected}, got {Literal(container)}.')
+        return function.func(container, *args)
+
+    return NativeFunction(first.name, first.arity, func)
+
+
+def type_name(value: LoxType, numbers: Numbers) -> str:
+    if value is None:
+        return 'nil'
+    if type(value) is bool:
+        return 'boolean'
+    if type(value) in numbers.types:
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, LoxList):
+        return 'list'
+    if isinstance(value, LoxMap):
+        return 'map'
+    if isinstance(value, LoxArray):
+        return 'array'
+    if isinstance(value, LoxChannel):
+        return 'channel'
+    if isinstance(value, LoxInstance):
+        return 'instance'
+    if isinstance(value, LoxClass):
+        return 'class'
+    if isinstance(value, Callable):
+        return 'function'
+    raise TypeError(f'Unknown Lox type {type(value).__name__}.')
@@ -0,0 +1,80 @@
+from abc import ABC, abstractmethod
+from decimal import Decimal
+
+from .types import LoxType
+
+
+class Numbers(ABC):
+    """Numeric mode deciding how Lox numbers are represented.
+
+    Affects what Python types are used for number literals, what types are
+    accepted as numbers by operators, and how division works.
+    """
+    name: str
+    types: tuple[type, ...]
+
+    @abstractmethod
+    def parse(self, literal: str) -> LoxType:
+        ...
+
+    @abstractmethod
+    def from_float(self, value: float) -> LoxType:
+        ...
+
+    def from_int(self, value: int) -> LoxType:
+        return self.parse(str(value))
+
+    def divide(self, dividend, divisor) -> LoxType:
+        return dividend / divisor
+
+
+class DecimalNumbers(Numbers):
+    """Exact decimal arithmetic. The default."""
+    name = 'decimal'
+    types = (Decimal,)
+
+    def parse(self, literal: str) -> Decimal:
+        return Decimal(literal)
+
+    def from_float(self, value: float) -> Decimal:
+        return Decimal(repr(value))
+
+
+class FloatNumbers(Numbers):
+    """All numbers are floats. Fast, but not exact."""
+    name = 'float'
+    types = (float,)
+
+    def parse(self, literal: str) -> float:
+        return float(literal)
+
+    def from_float(self, value: float) -> float:
+        return value
+
+
+class IntFloatNumbers(Numbers):
+    """Integers without a fraction are ints, others are floats.
+
+    Dividing integers returns an int if the result is exact and a float
+    otherwise.
+    """
+    name = 'int-float'
+    types = (int, float)
+
+    def parse(self, literal: str) -> int|float:
+        return float(literal) if '.' in literal else int(literal)
+
+    def from_float(self, value: float) -> float:
+        return value
+
+    def divide(self, dividend, divisor) -> int|float:
+        if type(dividend) is int and type(divisor) is int:
+            quotient, remainder = divmod(dividend, divisor)
+            if not remainder:
+                return quotient
+        return dividend / divisor
+
+
+NUMERIC_MODES: dict[str, Numbers] = {
+    mode.name: mode for mode in (DecimalNumbers(), FloatNumbers(), IntFloatNumbers())
+}
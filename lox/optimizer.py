@@ -0,0 +1,156 @@
+from .exceptions import RunError
+from .expressions import (Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical,
+                          Set, Super, This, Unary, Variable)
+from .interpreter import Interpreter
+from .numeric import NUMERIC_MODES, Numbers
+from .rope import Rope
+from .statements import (Block, Break, Class, Expression, Function, If, Print, Return,
+                         Stmt, Var, While)
+from .token import TokenType
+from .visitor import Visitor
+
+
+class Optimizer(Visitor):
+    """Simplifies resolved syntax trees without changing their behavior.
+
+    Folds operations having only literal operands, removes groupings,
+    prunes branches and loops with constant conditions, and drops
+    expression statements without side effects.
+
+    Nodes are modified in place, so variable resolutions recorded by
+    `Resolver` stay valid. Operations are folded by evaluating them with
+    an `Interpreter`. If that fails, the operation is left as is so that
+    the error is reported at runtime as usual.
+    """
+
+    def __init__(self, numbers: Numbers = NUMERIC_MODES['decimal']):
+        self.evaluator = Interpreter(lambda error: None, numbers)
+
+    def optimize(self, statements: list[Stmt]) -> list[Stmt]:
+        return [optimized for stmt in statements
+                if (optimized := self.visit(stmt)) is not None]
+
+    def visit_Block(self, stmt: Block) -> Stmt|None:
+        stmt.statements = self.optimize(stmt.statements)
+        return stmt if stmt.statements else None
+
+    def visit_Break(self, stmt: Break) -> Stmt:
+        return stmt
+
+    def visit_Class(self, stmt: Class) -> Stmt:
+        for method in stmt.methods:
+            self.visit(method)
+        return stmt
+
+    def visit_Expression(self, stmt: Expression) -> Stmt|None:
+        stmt.expression = self.visit(stmt.expression)
+        return stmt if not self.is_pure(stmt.expression) else None
+
+    def visit_Function(self, stmt: Function) -> Stmt:
+        stmt.body = self.optimize(stmt.body)
+        return stmt
+
+    def visit_If(self, stmt: If) -> Stmt|None:
+        stmt.condition = self.visit(stmt.condition)
+        then_branch = self.visit(stmt.then_branch)
+        else_branch = self.visit(stmt.else_branch) if stmt.else_branch else None
+        if isinstance(stmt.condition, Literal):
+            return then_branch if stmt.condition.value else else_branch
+        if then_branch is None and else_branch is None:
+            return self.visit(Expression(stmt.condition))
+        stmt.then_branch = then_branch or Block([])
+        stmt.else_branch = else_branch
+        return stmt
+
+    def visit_Print(self, stmt: Print) -> Stmt:
+        stmt.expression = self.visit(stmt.expression)
+        return stmt
+
+    def visit_Return(self, stmt: Return) -> Stmt:
+        if stmt.value is not None:
+            stmt.value = self.visit(stmt.value)
+            # Removing groupings can reveal tail calls.
+            stmt.tail_call = isinstance(stmt.value, Call)
+        return stmt
+
+    def visit_Var(self, stmt: Var) -> Stmt:
+        if stmt.initializer is not None:
+            stmt.initializer = self.visit(stmt.initializer)
+        return stmt
+
+    def visit_While(self, stmt: While) -> Stmt|None:
+        stmt.condition = self.visit(stmt.condition)
+        if isinstance(stmt.condition, Literal) and not stmt.condition.value:
+            return None
+        stmt.body = self.visit(stmt.body) or Block([])
+        return stmt
+
+    def visit_Assign(self, expr: Assign) -> Expr:
+        expr.value = self.visit(expr.value)
+        return expr
+
+    def visit_Binary(self, expr: Binary) -> Expr:
+        expr.left = self.visit(expr.left)
+        expr.right = self.visit(expr.right)
+        if isinstance(expr.left, Literal) and isinstance(expr.right, Literal):
+            return self.fold(expr)
+        return expr
+
+    def visit_Call(self, expr: Call) -> Expr:
+        expr.callee = self.visit(expr.callee)
+        expr.arguments = [self.visit(arg) for arg in expr.arguments]
+        return expr
+
+    def visit_Get(self, expr: Get) -> Expr:
+        expr.object = self.visit(expr.object)
+        return expr
+
+    def visit_Grouping(self, expr: Grouping) -> Expr:
+        return self.visit(expr.expression)
+
+    def visit_Literal(self, expr: Literal) -> Expr:
+        return expr
+
+    def visit_Logical(self, expr: Logical) -> Expr:
+        expr.left = self.visit(expr.left)
+        expr.right = self.visit(expr.right)
+        if isinstance(expr.left, Literal):
+            if expr.operator.type == TokenType.OR:
+                return expr.left if expr.left.value else expr.right
+            return expr.right if expr.left.value else expr.left
+        return expr
+
+    def visit_Set(self, expr: Set) -> Expr:
+        expr.object = self.visit(expr.object)
+        expr.value = self.visit(expr.value)
+        return expr
+
+    def visit_Super(self, expr: Super) -> Expr:
+        return expr
+
+    def visit_This(self, expr: This) -> Expr:
+        return expr
+
+    def visit_Unary(self, expr: Unary) -> Expr:
+        expr.right = self.visit(expr.right)
+        if isinstance(expr.right, Literal):
+            return self.fold(expr)
+        return expr
+
+    def visit_Variable(self, expr: Variable) -> Expr:
+        return expr
+
+    def fold(self, expr: Expr) -> Expr:
+        try:
+            value = self.evaluator.evaluate(expr)
+        except RunError:
+            return expr
+        return Literal(value.flatten() if type(value) is Rope else value)
+
+    def is_pure(self, expr: Expr) -> bool:
+        match expr:
+            case Literal() | This():
+                return True
+            case Logical(left=left, right=right):
+                return self.is_pure(left) and self.is_pure(right)
+        return False
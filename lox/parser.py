@@ -13,10 +13,13 @@ class ParseError(Exception):
 
 class Parser:
 
-    def __init__(self, tokens: list[Token],
+    def __init__(self, tokens: typing.Iterable[Token],
                  error_reporter: typing.Callable[[Token, str], None]):
-        self.tokens = tokens
-        self.current = 0
+        # Tokens are consumed lazily and only the current and the previous
+        # token are kept. The last token must be `EOF`.
+        self.tokens = iter(tokens)
+        self.current = next(self.tokens)
+        self.last: Token|None = None
         self.error_reporter = error_reporter
 
     def parse(self) -> list[Stmt]:
@@ -291,17 +294,17 @@ class Parser:
 
     def advance(self) -> Token:
         if not self.is_at_end():
-            self.current += 1
+            self.last, self.current = self.current, next(self.tokens)
         return self.previous()
 
     def is_at_end(self) -> bool:
         return self.peek().type == TokenType.EOF
 
     def peek(self) -> Token:
-        return self.tokens[self.current]
+        return self.current
 
     def previous(self) -> Token:
-        return self.tokens[self.current - 1]
+        return self.last    # type: ignore
 
     def consume(self, expected: TokenType, message: str):
         if self.check(expected):
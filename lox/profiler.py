@@ -0,0 +1,190 @@
+import signal
+from abc import ABC, abstractmethod
+import sys
+from collections import Counter
+from dataclasses import fields
+from pathlib import Path
+from types import FrameType
+from typing import TextIO
+
+from .closurecompiler import ClosureInterpreter
+from .engine import Engine
+from .expressions import Expr
+from .functions import LoxFunction, NativeFunction
+from .interpreter import Interpreter
+from .stackless import StacklessInterpreter
+from .statements import Stmt
+from .token import Token
+from .vm import VM
+
+
+# Lox call stack as (function, line) pairs, outermost first.
+Stack = tuple[tuple[str, int], ...]
+
+
+class Profiler(ABC):
+    """Statistical profiler for Lox programs.
+
+    Samples the Lox call stack using a CPU time based interval timer.
+    The running program is not instrumented in any way, so there is no
+    overhead when the profiler is not active. Sampling requires the
+    `SIGPROF` signal that is not available on Windows.
+
+    Use `for_engine` to create a profiler suitable for an engine and use it
+    as a context manager around running code.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter[Stack] = Counter()
+        self.previous_handler = None
+
+    @classmethod
+    def for_engine(cls, engine: Engine, interval: float = 0.005) -> 'Profiler':
+        if isinstance(engine, VM):
+            return VMProfiler(interval)
+        if isinstance(engine, ClosureInterpreter):
+            raise ValueError('Profiling is not supported with closures.')
+        if isinstance(engine, StacklessInterpreter):
+            raise ValueError('Profiling is not supported with the stackless interpreter.')
+        return InterpreterProfiler(interval)
+
+    def __enter__(self):
+        self.previous_handler = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *exc_info):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self.previous_handler)
+
+    def sample(self, signum: int, frame: FrameType|None):
+        if frame and (stack := self.lox_stack(frame)):
+            self.samples[stack] += 1
+
+    @abstractmethod
+    def lox_stack(self, frame: FrameType) -> Stack:
+        ...
+
+    def report(self, output: TextIO = sys.stderr, limit: int = 20):
+        total = sum(self.samples.values())
+        print(f'Profile: {total} samples, {total * self.interval:.2f}s CPU time.',
+              file=output)
+        if not total:
+            return
+        sections: list[tuple[str, Counter, Counter]] = [
+            ('Function', *self.totals(lambda stack: [name for name, _ in stack])),
+            ('Line', *self.totals(lambda stack: [f'{line:5}  {name}'
+                                                 for name, line in stack]))
+        ]
+        for title, inclusive, exclusive in sections:
+            print(file=output)
+            print(f'{"inclusive":>17} {"exclusive":>17}  {title}', file=output)
+            for key, count in inclusive.most_common(limit):
+                print(f'{self.format(count, total)} '
+                      f'{self.format(exclusive[key], total)}  {key}', file=output)
+
+    def totals(self, keys) -> tuple[Counter, Counter]:
+        inclusive: Counter[str] = Counter()
+        exclusive: Counter[str] = Counter()
+        for stack, count in self.samples.items():
+            stack_keys = keys(stack)
+            for key in set(stack_keys):
+                inclusive[key] += count
+            exclusive[stack_keys[-1]] += count
+        return inclusive, exclusive
+
+    def format(self, count: int, total: int) -> str:
+        return f'{count * self.interval:8.2f}s {count / total:7.1%}'
+
+    def write_collapsed(self, path: Path):
+        """Writes samples as collapsed stacks used by flame graph tools."""
+        with open(path, 'w') as file:
+            for stack, count in sorted(self.samples.items()):
+                frames = ';'.join(f'{name}:{line}' for name, line in stack)
+                file.write(f'{frames} {count}\n')
+
+
+class InterpreterProfiler(Profiler):
+    """Profiler for the tree-walking `Interpreter`.
+
+    Finds executed statements and called functions from the arguments of
+    `Interpreter.execute`, `LoxFunction.run` and `NativeFunction.call` in
+    the Python call stack.
+    """
+    execute = Interpreter.execute.__code__
+    run = LoxFunction.run.__code__
+    native = NativeFunction.call.__code__
+
+    def __init__(self, interval: float = 0.005):
+        super().__init__(interval)
+        self.lines: dict[int, int] = {}
+
+    def lox_stack(self, frame: FrameType) -> Stack:
+        stack = []
+        line = 0
+        current: FrameType|None = frame
+        while current:
+            code = current.f_code
+            if code is self.execute:
+                if not line:
+                    line = self.line(current.f_locals['stmt'])
+            elif code is self.run:
+                # `function` is not yet set when `run` has just started.
+                locals = current.f_locals
+                function = locals.get('function', locals['self'])
+                name = function.declaration.name
+                stack.append((name.lexeme, line or name.line))
+                line = 0
+            elif code is self.native:
+                stack.append((f'<native {current.f_locals["self"].name}>', 0))
+            current = current.f_back
+        if line:
+            stack.append(('<script>', line))
+        return tuple(reversed(stack))
+
+    def line(self, node: Stmt|Expr) -> int:
+        """Returns the line of the first token in `node`."""
+        if id(node) not in self.lines:
+            self.lines[id(node)] = self.find_line(node)
+        return self.lines[id(node)]
+
+    def find_line(self, node) -> int:
+        if isinstance(node, Token):
+            return node.line
+        if isinstance(node, list):
+            children = node
+        elif isinstance(node, (Stmt, Expr)):
+            children = [getattr(node, f.name) for f in fields(node)]
+        else:
+            return 0
+        for child in children:
+            if line := self.find_line(child):
+                return line
+        return 0
+
+
+class VMProfiler(Profiler):
+    """Profiler for the bytecode `VM`.
+
+    Reads the VM call frames. The instruction pointer of the running frame
+    is read from the local variables of `VM.run`.
+    """
+    run = VM.run.__code__
+
+    def lox_stack(self, frame: FrameType) -> Stack:
+        current: FrameType|None = frame
+        while current and current.f_code is not self.run:
+            current = current.f_back
+        if not current:
+            return ()
+        run_locals = current.f_locals
+        vm: VM = run_locals['self']
+        running = run_locals.get('frame')
+        stack = []
+        for call_frame in vm.frames:
+            ip = run_locals['ip'] if call_frame is running else call_frame.ip
+            function = call_frame.closure.function
+            line = function.chunk.lines[max(ip - 1, 0)]
+            stack.append((function.name or '<script>', line))
+        return tuple(stack)
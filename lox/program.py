@@ -0,0 +1,179 @@
+import threading
+import typing
+from dataclasses import dataclass
+from io import StringIO
+
+from .closurecompiler import ClosureCompiler, ClosureInterpreter
+from .compiler import Compiler
+from .exceptions import CompilationFailed, LoxError
+from .expressions import Get, Set
+from .interpreter import Interpreter
+from .lox import Lox, format_error
+from .numeric import NUMERIC_MODES
+from .statements import Stmt
+from .types import LoxType
+from .visitor import Visitor
+from .vm import VM
+
+
+@dataclass
+class RunResult:
+    # Output of `print` statements if `stdout` was not given to `Program.run`.
+    output: str
+    errors: list[str]
+    # Global variables defined by the program or given to it.
+    globals: dict[str, LoxType]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class Program:
+    """Compiled program that can be run multiple times.
+
+    Created with `compile`. Each run uses a new engine, so variables and
+    other execution state do not leak from one run to another. For the same
+    reason inline caches in the syntax tree are cleared before each run.
+    Programs compiled using the `async` engine can also be run with
+    `run_async`.
+
+    With the `vm` and `closures` engines, the program is compiled to
+    bytecode or closures only once. Compiled closures can be used only by
+    one run at a time, so concurrent runs compile them again.
+    """
+
+    def __init__(self, statements: list[Stmt], engine: str = 'interpreter',
+                 numbers: str = 'decimal'):
+        self.statements = statements
+        self.engine = engine
+        self.numbers = NUMERIC_MODES[numbers]
+        self.bytecode = Compiler().compile(statements) if engine == 'vm' else None
+        self.closures = self.compile_closures(statements) \
+            if engine == 'closures' else None
+        self.closures_lock = threading.Lock()
+        self.cached_nodes = CachedNodeFinder().find(statements)
+
+    def run(self, globals: dict[str, typing.Any]|None = None,
+            stdout: typing.TextIO|None = None) -> RunResult:
+        """Runs the program and returns its output and possible errors.
+
+        `globals` are defined as global variables before running the program.
+        Python integers and floats are converted to numbers used by the
+        program, other values must be valid Lox values. Output is written to
+        `stdout` if it is given and otherwise returned in the result.
+        """
+        engine, result = self.start(globals, stdout)
+        if self.bytecode:
+            engine.interpret_compiled(self.bytecode)    # type: ignore
+        elif self.closures and self.closures_lock.acquire(blocking=False):
+            try:
+                engine.interpret_compiled(*self.closures)    # type: ignore
+            finally:
+                self.closures_lock.release()
+        else:
+            engine.interpret(self.statements)
+        return result()
+
+    def compile_closures(self, statements: list[Stmt]):
+        # Compiled code uses stateless helpers of the interpreter given to
+        # the compiler. Using an interpreter that is never run avoids keeping
+        # globals of any run alive.
+        compiler = ClosureCompiler(ClosureInterpreter(lambda err: None, self.numbers))
+        return compiler.compile(statements), compiler.runtime
+
+    async def run_async(self, globals: dict[str, typing.Any]|None = None,
+                        stdout: typing.TextIO|None = None,
+                        switch_interval: int|None = None) -> RunResult:
+        """Like `run`, but runs the program as a coroutine.
+
+        Requires compiling the program using the `async` engine. Multiple
+        runs can execute concurrently in the same event loop. They switch
+        when waiting for async native functions and, if `switch_interval` is
+        given, after executing that many statements.
+        """
+        if self.engine != 'async':
+            raise ValueError(f"Running asynchronously requires the 'async' engine, "
+                             f"got '{self.engine}'.")
+        engine, result = self.start(globals, stdout)
+        engine.switch_interval = switch_interval    # type: ignore
+        await engine.interpret_async(self.statements)    # type: ignore
+        return result()
+
+    def start(self, globals: dict[str, typing.Any]|None,
+              stdout: typing.TextIO|None) -> tuple[Interpreter|VM,
+                                                   typing.Callable[[], RunResult]]:
+        """Creates an engine for a run and a function returning the result."""
+        errors = []
+        engine = Lox.engines[self.engine](
+            lambda err: errors.append(format_error(err.message, err.token.line)),
+            self.numbers
+        )
+        assert isinstance(engine, (Interpreter, VM))    # Make mypy happy.
+        output = StringIO() if stdout is None else None
+        engine.stdout = stdout or output
+        values = engine.globals if isinstance(engine, VM) else engine.globals.values
+        natives = dict(values)
+        if globals:
+            values.update({name: self.to_lox(value) for name, value in globals.items()})
+        for node in self.cached_nodes:
+            node.cache = None
+
+        def result() -> RunResult:
+            return RunResult(output.getvalue() if output else '', errors,
+                             {name: value for name, value in values.items()
+                              if natives.get(name) is not value})
+
+        return engine, result
+
+    def to_lox(self, value: typing.Any) -> LoxType:
+        if type(value) is int:
+            return self.numbers.from_int(value)
+        if type(value) is float:
+            return self.numbers.from_float(value)
+        return value
+
+
+class CachedNodeFinder(Visitor):
+    """Finds nodes having inline caches."""
+
+    def __init__(self):
+        self.nodes: list[Get|Set] = []
+
+    def find(self, statements: list[Stmt]) -> list[Get|Set]:
+        for stmt in statements:
+            self.visit(stmt)
+        return self.nodes
+
+    def start_Get(self, expr: Get):
+        self.nodes.append(expr)
+
+    def start_Set(self, expr: Set):
+        self.nodes.append(expr)
+
+
+class ErrorCollector(Lox):
+    """Collects errors instead of printing them."""
+
+    def __init__(self, engine: str, numbers: str, optimize: bool):
+        super().__init__(engine, numbers, optimize)
+        self.errors: list[str] = []
+
+    def report(self, message: str, line: int, where: str = '', runtime_error=False):
+        self.errors.append(format_error(message, line, where))
+        self.error_code = 65
+
+
+def compile(source: str, engine: str = 'interpreter', numbers: str = 'decimal',
+            optimize: bool = False) -> Program:
+    """Compiles `source` to a `Program` that can be run multiple times.
+
+    Raises `CompilationFailed` if `source` has errors.
+    """
+    collector = ErrorCollector(engine, numbers, optimize)
+    if (statements := collector.compile(source)) is None:
+        raise CompilationFailed(collector.errors)
+    try:
+        return Program(statements, engine, numbers)
+    except LoxError as err:
+        raise CompilationFailed([format_error(err.message, err.token.line)]) from None
@@ -1,7 +1,6 @@
 from typing import Callable
 
-from .expressions import Assign, Expr, Super, This, Variable
-from .interpreter import Interpreter
+from .expressions import Assign, Call, Super, This, Variable
 from .statements import Block, Break, Class, Function, Return, Stmt, Var, While
 from .token import Token
 from .visitor import Visitor
@@ -9,13 +8,24 @@ from .visitor import Visitor
 
 class Resolver(Visitor):
 
-    def __init__(self, interpreter: Interpreter,
-                 error_reporter: Callable[[Token, str], None]):
-        self.interpreter = interpreter
-        self.scopes: list[dict[str, bool]] = []
+    """Resolves local variables and tail calls.
+
+    Sets `depth` and `slot` of `Variable`, `Assign`, `This` and `Super`
+    nodes referring to local variables. Depth is the number of scopes
+    between the node and the variable and slot is the variable's index in
+    its scope. Also marks `Return` statements returning a call as tail calls.
+    """
+
+    def __init__(self, error_reporter: Callable[[Token, str], None]):
+        # Slots of variables in each scope by name.
+        self.scopes: list[dict[str, int]] = []
+        # Variables declared but not yet defined in each scope.
+        self.undefined: list[set[str]] = []
         self.classes: list[Class] = []
         self.functions: list[Function] = []
         self.loops = 0
+        # Loop counts of enclosing functions.
+        self.enclosing_loops: list[int] = []
         self.error_reporter = error_reporter
 
     def resolve(self, statements: list[Stmt]):
@@ -35,7 +45,7 @@ class Resolver(Visitor):
         self.define(stmt.name)
 
     def visit_Variable(self, expr: Variable):
-        if self.scopes and self.scopes[-1].get(expr.name.lexeme) is False:
+        if self.undefined and expr.name.lexeme in self.undefined[-1]:
             self.error_reporter(expr.name,
                                 'Cannot read local variable in its own initializer.')
         self.resolve_local(expr, expr.name)
@@ -47,14 +57,18 @@ class Resolver(Visitor):
         self.declare(stmt.name)
         self.define(stmt.name)
         self.functions.append(stmt)
+        # Loops outside the function cannot be broken from inside it.
+        self.enclosing_loops.append(self.loops)
+        self.loops = 0
         self.begin_scope()
         self.resolve_function(stmt)
 
     def end_Function(self, stmt: Function):
         self.end_scope()
         self.functions.pop()
+        self.loops = self.enclosing_loops.pop()
 
-    def start_Class(self, stmt: Class):
+    def visit_Class(self, stmt: Class):
         self.declare(stmt.name)
         self.define(stmt.name)
         self.classes.append(stmt)
@@ -62,12 +76,14 @@ class Resolver(Visitor):
             if stmt.name.lexeme == stmt.superclass.name.lexeme:
                 self.error_reporter(stmt.superclass.name,
                                     'Class cannot inherit from itself.')
+            # Superclass is evaluated in the scope enclosing the class.
+            stmt.superclass.accept(self)
             self.begin_scope()
-            self.scopes[-1]['super'] = True
+            self.scopes[-1]['super'] = 0
         self.begin_scope()
-        self.scopes[-1]['this'] = True
-
-    def end_Class(self, stmt: Class):
+        self.scopes[-1]['this'] = 0
+        for method in stmt.methods:
+            method.accept(self)
         self.end_scope()
         if stmt.superclass is not None:
             self.end_scope()
@@ -98,6 +114,8 @@ class Resolver(Visitor):
             self.error_reporter(stmt.keyword, 'Cannot return from top-level code.')
         elif self.functions[-1].is_init and stmt.value is not None:
             self.error_reporter(stmt.keyword, "Cannot return value from 'init'.")
+        elif isinstance(stmt.value, Call):
+            stmt.tail_call = True
 
     def start_Break(self, stmt: Break):
         if not self.loops:
@@ -105,9 +123,11 @@ class Resolver(Visitor):
 
     def begin_scope(self):
         self.scopes.append({})
+        self.undefined.append(set())
 
     def end_scope(self):
         self.scopes.pop()
+        self.undefined.pop()
 
     def declare(self, name: Token):
         if self.scopes:
@@ -115,16 +135,19 @@ class Resolver(Visitor):
             if name.lexeme in scope:
                 self.error_reporter(name, f"A variable with name '{name.lexeme}' "
                                           f"exists in this scope already.")
-            scope[name.lexeme] = False
+            else:
+                # Slots are assigned in declaration order.
+                scope[name.lexeme] = len(scope)
+            self.undefined[-1].add(name.lexeme)
 
     def define(self, name: Token):
-        if self.scopes:
-            self.scopes[-1][name.lexeme] = True
+        if self.undefined:
+            self.undefined[-1].discard(name.lexeme)
 
-    def resolve_local(self, expr: Expr, name: Token):
+    def resolve_local(self, expr: Assign|Super|This|Variable, name: Token):
         for depth, scope in enumerate(reversed(self.scopes)):
-            if name.lexeme in scope:
-                self.interpreter.resolve(expr, depth)
+            if (slot := scope.get(name.lexeme)) is not None:
+                expr.depth, expr.slot = depth, slot
                 return
 
     def resolve_function(self, function: Function):
@@ -0,0 +1,69 @@
+class Rope:
+    """String built by concatenation and joined only when needed.
+
+    Concatenating strings in a loop would copy the accumulated string on
+    every round, making building long strings quadratic. Ropes collect the
+    concatenated parts to a list instead. Ropes created by appending to
+    a rope share the list, and each rope knows how many of its parts
+    belong to it.
+
+    Ropes are transparent to Lox programs. They are converted to normal
+    strings when printed, compared, hashed and passed to native functions.
+    """
+    __slots__ = ('parts', 'count', 'length', 'string')
+    # Shorter strings are concatenated normally.
+    min_length = 1024
+
+    def __init__(self, parts: list[str], length: int):
+        self.parts = parts
+        self.count = len(parts)
+        self.length = length
+        self.string: str|None = None
+
+    def append(self, other: 'str|Rope') -> 'Rope':
+        if isinstance(other, Rope):
+            other = other.flatten()
+        if len(self.parts) == self.count:
+            parts = self.parts
+        else:
+            # Some other rope has already been appended to the list.
+            parts = [self.flatten()]
+        parts.append(other)
+        return Rope(parts, self.length + len(other))
+
+    def flatten(self) -> str:
+        if self.string is None:
+            self.string = ''.join(self.parts[:self.count])
+            self.parts = [self.string]
+            self.count = 1
+        return self.string
+
+    def __str__(self) -> str:
+        return self.flatten()
+
+    def __repr__(self) -> str:
+        return repr(self.flatten())
+
+    def __eq__(self, other) -> bool:
+        if type(other) is Rope:
+            return self.flatten() == other.flatten()
+        if type(other) is str:
+            return self.flatten() == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.flatten())
+
+    def __bool__(self) -> bool:
+        return self.length > 0
+
+
+def concat(left: str|Rope, right: str|Rope) -> str|Rope:
+    """Concatenates strings creating a rope if the result is long."""
+    if isinstance(left, Rope):
+        return left.append(right)
+    if isinstance(right, Rope):
+        right = right.flatten()
+    if len(left) + len(right) < Rope.min_length:
+        return left + right
+    return Rope([left, right], len(left) + len(right))
@@ -1,12 +1,21 @@
-from decimal import Decimal
-from string import ascii_letters, digits
-from typing import Callable
+import re
+from sys import intern
+from typing import Callable, Iterator
 
-from .token import Token, TokenType
-from .token import LoxType
+from .numeric import NUMERIC_MODES, Numbers
+from .token import Token, TokenArray, TokenType
+from .types import LoxType
 
 
 class Scanner:
+    """Splits source code into tokens.
+
+    Uses a single regular expression matching all tokens as well as
+    whitespace, comments and invalid characters between them.
+
+    Lexemes of identifiers, keywords and operators are interned, and tokens
+    with the same literal share the lexeme and the value.
+    """
     keywords = {
         'and': TokenType.AND,
         'break': TokenType.BREAK,
@@ -27,149 +36,79 @@ class Scanner:
         'while': TokenType.WHILE
     }
 
-    def __init__(self, source: str, error_reporter: Callable[[int, str], None]):
+    operators = {
+        '(': TokenType.LEFT_PAREN,
+        ')': TokenType.RIGHT_PAREN,
+        '{': TokenType.LEFT_BRACE,
+        '}': TokenType.RIGHT_BRACE,
+        ',': TokenType.COMMA,
+        '.': TokenType.DOT,
+        '-': TokenType.MINUS,
+        '+': TokenType.PLUS,
+        ';': TokenType.SEMICOLON,
+        '/': TokenType.SLASH,
+        '*': TokenType.STAR,
+        '!': TokenType.BANG,
+        '!=': TokenType.BANG_EQUAL,
+        '=': TokenType.EQUAL,
+        '==': TokenType.EQUAL_EQUAL,
+        '>': TokenType.GREATER,
+        '>=': TokenType.GREATER_EQUAL,
+        '<': TokenType.LESS,
+        '<=': TokenType.LESS_EQUAL
+    }
+    # A NUL character ends comments and strings like the end of the source.
+    pattern = re.compile(r'''
+        (?P<SPACE>[ \t\r\n]+|//[^\n\x00]*)
+      | (?P<IDENTIFIER>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<NUMBER>[0-9]+(?:\.[0-9]+)?)
+      | (?P<OPERATOR>[!=<>]=?|[(){},.\-+;/*])
+      | (?P<STRING>"[^"\x00]*["\x00]?)
+      | (?P<INVALID>.)
+    ''', re.VERBOSE | re.DOTALL)
+
+    def __init__(self, source: str, error_reporter: Callable[[int, str], None],
+                 numbers: Numbers = NUMERIC_MODES['decimal']):
         self.source = source
-        self.tokens: list[Token] = []
-        self.start = 0
-        self.current = 0
-        self.line = 1
+        self.numbers = numbers
         self.error_reporter = error_reporter
 
     def scan_tokens(self) -> list[Token]:
-        while not self.is_at_end():
-            self.start = self.current
-            self.scan_token()
-        self.tokens.append(Token(TokenType.EOF, '', None, self.line))
-        return self.tokens
-
-    def is_at_end(self):
-        return self.current >= len(self.source)
-
-    def scan_token(self):
-        char = self.advance()
-        match char:
-            case '(':
-                self.add_token(TokenType.LEFT_PAREN)
-            case ')':
-                self.add_token(TokenType.RIGHT_PAREN)
-            case '{':
-                self.add_token(TokenType.LEFT_BRACE)
-            case '}':
-                self.add_token(TokenType.RIGHT_BRACE)
-            case ',':
-                self.add_token(TokenType.COMMA)
-            case '.':
-                self.add_token(TokenType.DOT)
-            case '-':
-                self.add_token(TokenType.MINUS)
-            case '+':
-                self.add_token(TokenType.PLUS)
-            case ';':
-                self.add_token(TokenType.SEMICOLON)
-            case '*':
-                self.add_token(TokenType.STAR)
-            case '!' if self.match('='):
-                self.add_token(TokenType.BANG_EQUAL)
-            case '!':
-                self.add_token(TokenType.BANG)
-            case '=' if self.match('='):
-                self.add_token(TokenType.EQUAL_EQUAL)
-            case '=':
-                self.add_token(TokenType.EQUAL)
-            case '<' if self.match('='):
-                self.add_token(TokenType.LESS_EQUAL)
-            case '<':
-                self.add_token(TokenType.LESS)
-            case '>' if self.match('='):
-                self.add_token(TokenType.GREATER_EQUAL)
-            case '>':
-                self.add_token(TokenType.GREATER)
-            case '/' if self.match('/'):
-                self.comment()
-            case '/':
-                self.add_token(TokenType.SLASH)
-            case ' ' | '\r' | '\t':
-                pass
-            case '\n':
-                self.line += 1
-            case '"':
-                self.string()
-            case _ if self.is_digit(char):
-                self.number()
-            case _ if self.is_identifier_start(char):
-                self.identifier()
-            case _:
-                self.error(f'Unexpected character {char}.')
-
-    def advance(self):
-        char = self.source[self.current]
-        self.current += 1
-        return char
-
-    def match(self, expected: str):
-        if self.peek() != expected:
-            return False
-        self.current += 1
-        return True
-
-    def peek(self):
-        try:
-            return self.source[self.current]
-        except IndexError:
-            return '\x00'
-
-    def peek_next(self):
-        try:
-            return self.source[self.current + 1]
-        except IndexError:
-            return '\x00'
-
-    def comment(self):
-        while self.peek() not in ('\n', '\x00'):
-            self.advance()
-
-    def string(self):
-        while self.peek() not in ('"', '\x00'):
-            if self.advance() == '\n':
-                self.line += 1
-        if self.is_at_end():
-            self.error('Unterminated string.')
-            return
-        self.advance()    # Consume closing '"'.
-        value = self.source[self.start + 1:self.current - 1]
-        self.add_token(TokenType.STRING, value)
-
-    def number(self):
-        while self.is_digit(self.peek()):
-            self.advance()
-        if self.peek() == '.' and self.is_digit(self.peek_next()):
-            self.advance()    # Consume '.'.
-            while self.is_digit(self.peek()):
-                self.advance()
-        value = self.source[self.start:self.current]
-        self.add_token(TokenType.NUMBER, Decimal(value))
-
-    def identifier(self):
-        while self.is_identifier_body(self.peek()):
-            self.advance()
-        value = self.source[self.start:self.current]
-        if value in self.keywords:
-            self.add_token(self.keywords[value])
-        else:
-            self.add_token(TokenType.IDENTIFIER)
-
-    def is_digit(self, char):
-        return char in digits
-
-    def is_identifier_start(self, char):
-        return char in ascii_letters or char == '_'
-
-    def is_identifier_body(self, char):
-        return self.is_identifier_start(char) or self.is_digit(char)
-
-    def add_token(self, type: TokenType, literal: LoxType = None):
-        text = self.source[self.start:self.current]
-        self.tokens.append(Token(type, text, literal, self.line))
-
-    def error(self, message: str):
-        self.error_reporter(self.line, message)
+        return list(self.scan_tokens_iter())
+
+    def scan_token_array(self) -> TokenArray:
+        """Like `scan_tokens`, but stores tokens compactly."""
+        return TokenArray(self.scan_tokens_iter())
+
+    def scan_tokens_iter(self) -> Iterator[Token]:
+        """Generates tokens lazily. The last token is always `EOF`."""
+        operators = self.operators
+        keywords = self.keywords
+        identifier = TokenType.IDENTIFIER
+        parse_number = self.numbers.parse
+        literals: dict[str, tuple[str, LoxType]] = {}
+        line = 1
+        for match in self.pattern.finditer(self.source):
+            kind = match.lastgroup
+            text = match.group()
+            if kind == 'SPACE':
+                line += text.count('\n')
+            elif kind == 'IDENTIFIER':
+                yield Token(keywords.get(text, identifier), intern(text), None, line)
+            elif kind == 'OPERATOR':
+                yield Token(operators[text], intern(text), None, line)
+            elif kind == 'NUMBER':
+                if (literal := literals.get(text)) is None:
+                    literal = literals[text] = (text, parse_number(text))
+                yield Token(TokenType.NUMBER, literal[0], literal[1], line)
+            elif kind == 'STRING':
+                line += text.count('\n')
+                if len(text) > 1 and text[-1] in '"\x00':
+                    if (literal := literals.get(text)) is None:
+                        literal = literals[text] = (text, text[1:-1])
+                    yield Token(TokenType.STRING, literal[0], literal[1], line)
+                else:
+                    self.error_reporter(line, 'Unterminated string.')
+            else:
+                self.error_reporter(line, f'Unexpected character {text}.')
+        yield Token(TokenType.EOF, '', None, line)
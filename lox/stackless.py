@@ -0,0 +1,244 @@
+from types import GeneratorType
+from typing import Generator
+
+from .classes import LoxClass, LoxInstance
+from .completion import BREAK, ReturnValue, TailCall
+from .environment import Environment, GlobalEnvironment
+from .exceptions import LoxError, NativeError, RunError
+from .expressions import (GLOBAL, Assign, Binary, Call, Expr, Get, Grouping, Literal,
+                          Logical, Set, Unary)
+from .functions import Callable, LoxFunction
+from .interpreter import Interpreter
+from .statements import Block, Expression, If, Print, Return, Stmt, Var, While
+from .token import Token, TokenType
+from .types import LoxType
+
+
+class StacklessInterpreter(Interpreter):
+    """Interpreter that does not use the Python call stack for Lox calls.
+
+    `visit_Node` methods of nodes having child nodes are generators. They
+    yield child nodes to execute or evaluate and get their results back.
+    `run` drives them using an explicit stack of generators, so the depth
+    of Lox calls is not limited by Python's recursion limit, but only by
+    `max_depth` and available memory. Exceeding `max_depth` is reported
+    as a stack overflow.
+
+    This is considerably slower than the normal `Interpreter` and meant for
+    programs needing deep recursion.
+    """
+    max_depth = 100_000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.depth = 0
+
+    def interpret(self, statements: list[Stmt]):
+        try:
+            for stmt in statements:
+                self.run(stmt)
+        except LoxError as err:
+            # Generators are abandoned on errors, so they cannot restore state.
+            self.environment = self.globals
+            self.depth = 0
+            self.error_reporter(err)
+
+    def run(self, node: Stmt|Expr):
+        """Executes or evaluates `node` and returns the result."""
+        result = self.visit(node)
+        if type(result) is not GeneratorType:
+            return result
+        return self.drive(result)
+
+    def drive(self, generator: Generator):
+        stack = [generator]
+        result = None
+        while stack:
+            try:
+                node = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+            else:
+                result = self.visit(node)
+                if type(result) is GeneratorType:
+                    stack.append(result)
+                    result = None
+        return result
+
+    def execute(self, stmt: Stmt):
+        return self.run(stmt)
+
+    def evaluate(self, expr: Expr):
+        return self.run(expr)
+
+    def call_nested(self, callee: Callable, arguments: list[LoxType]) -> LoxType:
+        if not isinstance(callee, (LoxFunction, LoxClass)):
+            return callee.call(self, arguments)
+        return self.drive(self.call_value(callee, arguments, None))
+
+    def execute_block(self, statements: list[Stmt], environment: Environment):
+        previous, self.environment = self.environment, environment
+        for stmt in statements:
+            if (completion := (yield stmt)) is not None:
+                self.environment = previous
+                return completion
+        self.environment = previous
+        return None
+
+    def visit_Block(self, stmt: Block):
+        return (yield from self.execute_block(stmt.statements,
+                                              Environment(self.environment)))
+
+    def visit_Expression(self, stmt: Expression):
+        yield stmt.expression
+
+    def visit_If(self, stmt: If):
+        if (yield stmt.condition):
+            return (yield stmt.then_branch)
+        if stmt.else_branch is not None:
+            return (yield stmt.else_branch)
+        return None
+
+    def visit_Print(self, stmt: Print):
+        value = yield stmt.expression
+        print(Literal(value), file=self.stdout)
+
+    def visit_Return(self, stmt: Return):
+        if stmt.tail_call:
+            return (yield from self.tail_call(stmt.value))    # type: ignore
+        value = (yield stmt.value) if stmt.value is not None else None
+        return ReturnValue(value)
+
+    def visit_Var(self, stmt: Var):
+        value = (yield stmt.initializer) if stmt.initializer is not None else None
+        self.environment.define(stmt.name.lexeme, value)
+
+    def visit_While(self, stmt: While):
+        while (yield stmt.condition):
+            if (completion := (yield stmt.body)) is not None:
+                return completion if completion is not BREAK else None
+        return None
+
+    def visit_Assign(self, expr: Assign):
+        value = yield expr.value
+        if expr.depth == GLOBAL:
+            self.globals.assign(expr.name, value)
+        else:
+            self.environment.assign_at(expr.depth, expr.slot, value)    # type: ignore
+        return value
+
+    def visit_Binary(self, expr: Binary):
+        left = yield expr.left
+        right = yield expr.right
+        return self.binary(expr.operator, left, right)
+
+    def visit_Call(self, expr: Call):
+        closure = None
+        if type(expr.callee) is Get:
+            callee, closure = yield from self.method(expr.callee)
+        else:
+            callee = yield expr.callee
+        arguments = yield from self.arguments(expr)
+        return (yield from self.call_value(callee, arguments, expr.paren, closure))
+
+    def tail_call(self, expr: Call):
+        closure = None
+        if type(expr.callee) is Get:
+            callee, closure = yield from self.method(expr.callee)
+        else:
+            callee = yield expr.callee
+        arguments = yield from self.arguments(expr)
+        if isinstance(callee, LoxFunction) and callee.arity == len(arguments):
+            return TailCall(callee, closure or callee.closure, arguments)
+        return ReturnValue((yield from self.call_value(callee, arguments, expr.paren)))
+
+    def method(self, get: Get):
+        """Returns a member to call and the closure to call it with, if any.
+
+        Methods are not bound to instances, but called with a closure
+        containing the instance instead.
+        """
+        instance = yield get.object
+        if not isinstance(instance, LoxInstance):
+            raise RunError('Only instances have properties.', get.name)
+        member = self.lookup_member(get, instance)
+        if type(member) is int:
+            return instance.fields[member], None
+        return member, Environment(member.closure, [instance])    # type: ignore
+
+    def arguments(self, expr: Call):
+        arguments = []
+        for arg in expr.arguments:
+            arguments.append((yield arg))
+        return arguments
+
+    def call_value(self, callee: LoxType, arguments: list[LoxType], paren: Token|None,
+                   closure: Environment|GlobalEnvironment|None = None):
+        if isinstance(callee, LoxFunction) and callee.arity == len(arguments):
+            return (yield from self.run_function(callee, closure or callee.closure,
+                                                 arguments, paren))
+        if isinstance(callee, LoxClass) and callee.arity == len(arguments):
+            instance = LoxInstance(callee)
+            if (initializer := callee.find_method('init')) is not None:
+                yield from self.run_function(initializer,
+                                             Environment(initializer.closure, [instance]),
+                                             arguments, paren)
+            return instance
+        # Native functions and invalid calls.
+        return self.call(callee, arguments, paren)    # type: ignore
+
+    def run_function(self, function: LoxFunction, closure: Environment|GlobalEnvironment,
+                     arguments: list[LoxType], paren: Token|None):
+        if self.depth == self.max_depth:
+            # Calls made by native functions have no token. Native function
+            # errors are reported using the token of the native function call.
+            if paren is None:
+                raise NativeError('Stack overflow.')
+            raise RunError('Stack overflow.', paren)
+        self.depth += 1
+        while True:
+            environment = Environment(closure, arguments)
+            completion = yield from self.execute_block(function.declaration.body,
+                                                       environment)
+            if type(completion) is not TailCall:
+                break
+            function = completion.function
+            closure = completion.closure
+            arguments = completion.arguments
+        self.depth -= 1
+        if function.is_initializer:
+            assert type(closure) is Environment    # Make mypy happy.
+            return closure.values[0]
+        return completion.value if type(completion) is ReturnValue else None
+
+    def visit_Get(self, expr: Get):
+        instance = yield expr.object
+        if not isinstance(instance, LoxInstance):
+            raise RunError('Only instances have properties.', expr.name)
+        return instance.get_member(self.lookup_member(expr, instance))
+
+    def visit_Grouping(self, expr: Grouping):
+        return (yield expr.expression)
+
+    def visit_Logical(self, expr: Logical):
+        left = yield expr.left
+        type = expr.operator.type
+        if type == TokenType.OR and left or type == TokenType.AND and not left:
+            return left
+        return (yield expr.right)
+
+    def visit_Unary(self, expr: Unary):
+        right = yield expr.right
+        match expr.operator.type:
+            case TokenType.MINUS:
+                self.check_number_operands(expr.operator, right)
+                return -right
+            case TokenType.BANG:
+                return not right
+
+    def visit_Set(self, expr: Set):
+        instance = yield expr.object
+        if not isinstance(instance, LoxInstance):
+            raise RunError('Only instances have properties.', expr.name)
+        self.store_property(expr, instance, (yield expr.value))
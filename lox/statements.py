@@ -1,35 +1,35 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Literal
 
 from .expressions import Expr, Variable
 from .token import Token
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Stmt:
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Block(Stmt):
     statements: list[Stmt]
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Break(Stmt):
     keyword: Token    # For error reporting purposes.
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Class(Stmt):
     name: Token
     superclass: Variable|None
     methods: list['Function']
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Function(Stmt):
     name: Token
     params: list[Token]
@@ -41,36 +41,38 @@ class Function(Stmt):
         return self.kind == 'method' and self.name.lexeme == 'init'
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class If(Stmt):
     condition: Expr
     then_branch: Stmt
     else_branch: Stmt|None
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Expression(Stmt):
     expression: Expr
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Print(Stmt):
     expression: Expr
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Return(Stmt):
     keyword: Token    # For error reporting.
     value: Expr|None
+    # Set by `Resolver` when the returned value is a call.
+    tail_call: bool = field(default=False, repr=False)
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class Var(Stmt):
     name: Token
     initializer: Expr|None
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class While(Stmt):
     condition: Expr
     body: Stmt
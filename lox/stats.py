@@ -0,0 +1,136 @@
+import json
+import sys
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import perf_counter
+
+from .classes import LoxClass
+from .completion import ReturnValue
+from .expressions import Call, Expr, Get
+from .functions import Callable, LoxFunction
+from .interpreter import Interpreter
+from .statements import Stmt
+from .token import Token
+from .types import LoxType
+
+
+@dataclass
+class CallStats:
+    name: str
+    kind: str    # 'function', 'native' or 'class'.
+    line: int|None = None
+    calls: int = 0
+    total_time: float = 0.0
+    self_time: float = 0.0
+    arity_mismatches: int = 0
+    # Number of calls currently running. Used for not counting time of
+    # recursive calls to `total_time` multiple times.
+    active: int = field(default=0, repr=False, compare=False)
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        del data['active']
+        return data
+
+
+class Stats:
+    """Call and node evaluation statistics collected by `StatsInterpreter`.
+
+    `functions` contains `CallStats` for each called function, native
+    function and class. Functions are identified by their declarations, so
+    all closures and bound methods created from one declaration share
+    the same statistics. `nodes` counts executed statements and evaluated
+    expressions by their type.
+    """
+
+    def __init__(self):
+        self.functions: dict[object, CallStats] = {}
+        self.nodes: Counter[type] = Counter()
+
+    def for_callable(self, callee: Callable) -> CallStats:
+        key = callee.declaration if isinstance(callee, LoxFunction) else callee
+        if key not in self.functions:
+            self.functions[key] = self.create(callee)
+        return self.functions[key]
+
+    def create(self, callee: Callable) -> CallStats:
+        if isinstance(callee, LoxFunction):
+            name = callee.declaration.name
+            return CallStats(name.lexeme, 'function', name.line)
+        if isinstance(callee, LoxClass):
+            return CallStats(callee.name, 'class')
+        return CallStats(callee.name, 'native')    # type: ignore
+
+    def as_dict(self) -> dict:
+        functions = sorted(self.functions.values(),
+                           key=lambda s: (-s.self_time, s.name))
+        nodes = sorted(self.nodes.items(), key=lambda item: (-item[1], item[0].__name__))
+        return {'functions': [f.as_dict() for f in functions],
+                'nodes': {node.__name__: count for node, count in nodes}}
+
+    def write_json(self, path: Path|None = None):
+        """Writes statistics as JSON to `path` or to the standard output."""
+        data = json.dumps(self.as_dict(), indent=2) + '\n'
+        if path:
+            path.write_text(data)
+        else:
+            sys.stdout.write(data)
+
+
+class StatsInterpreter(Interpreter):
+    """`Interpreter` collecting statistics about calls and evaluated nodes.
+
+    Statistics are available in the `stats` attribute. Collecting them
+    slows execution down considerably, but because this is a separate
+    interpreter, normal runs are not affected.
+
+    Time spent by a class call includes running its initializer. Self time
+    of a function excludes time spent in functions and classes it calls.
+    Tail calls are run as normal calls so that they are timed separately.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = Stats()
+        # Time spent in calls made by each running call.
+        self.child_times: list[float] = []
+
+    def execute(self, stmt: Stmt):
+        self.stats.nodes[type(stmt)] += 1
+        return super().execute(stmt)
+
+    def evaluate(self, expr: Expr):
+        self.stats.nodes[type(expr)] += 1
+        return super().evaluate(expr)
+
+    def invoke(self, expr: Call, get: Get):
+        # Methods are bound so that all calls go through `call`.
+        callee = self.evaluate(get)
+        arguments = [self.evaluate(arg) for arg in expr.arguments]
+        return self.call(callee, arguments, expr.paren)
+
+    def tail_call(self, expr: Call):
+        return ReturnValue(self.evaluate(expr))
+
+    def call(self, callee: LoxType, arguments: list[LoxType], paren: Token):
+        if not isinstance(callee, Callable):
+            return super().call(callee, arguments, paren)
+        stats = self.stats.for_callable(callee)
+        if callee.arity != len(arguments):
+            stats.arity_mismatches += 1
+            return super().call(callee, arguments, paren)
+        stats.calls += 1
+        stats.active += 1
+        self.child_times.append(0.0)
+        start = perf_counter()
+        try:
+            return super().call(callee, arguments, paren)
+        finally:
+            elapsed = perf_counter() - start
+            stats.self_time += elapsed - self.child_times.pop()
+            stats.active -= 1
+            if not stats.active:
+                stats.total_time += elapsed
+            if self.child_times:
+                self.child_times[-1] += elapsed
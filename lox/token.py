@@ -1,3 +1,5 @@
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
 from enum import Enum, auto
 from dataclasses import dataclass
 
@@ -58,10 +60,59 @@ class TokenType(Enum):
         return str(self)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Token:
     type: TokenType
     lexeme: str
     literal: LoxType = None
     line: int = -1
 
+
+class TokenArray(Sequence[Token]):
+    """Compact sequence of tokens.
+
+    Token types, lexemes and lines are stored in parallel arrays. Distinct
+    lexemes and their literal values are stored only once, and `Token`
+    objects are created only when they are accessed. Created with
+    `Scanner.scan_token_array` and can be parsed like a list of tokens.
+    """
+    __slots__ = ('types', 'lexeme_ids', 'lines', 'lexemes', 'literals', 'ids')
+    token_types = list(TokenType)
+    type_codes = {typ: code for code, typ in enumerate(token_types)}
+
+    def __init__(self, tokens: Iterable[Token] = ()):
+        self.types = array('B')
+        self.lexeme_ids = array('L')
+        self.lines = array('L')
+        self.lexemes: list[str] = []
+        self.literals: list[LoxType] = []
+        self.ids: dict[str, int] = {}
+        self.extend(tokens)
+
+    def append(self, token: Token):
+        lexeme_id = self.ids.get(token.lexeme)
+        if lexeme_id is None:
+            lexeme_id = self.ids[token.lexeme] = len(self.lexemes)
+            self.lexemes.append(token.lexeme)
+            self.literals.append(token.literal)
+        self.types.append(self.type_codes[token.type])
+        self.lexeme_ids.append(lexeme_id)
+        self.lines.append(token.line)
+
+    def extend(self, tokens: Iterable[Token]):
+        for token in tokens:
+            self.append(token)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        lexeme_id = self.lexeme_ids[index]
+        return Token(self.token_types[self.types[index]], self.lexemes[lexeme_id],
+                     self.literals[lexeme_id], self.lines[index])
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self)):
+            yield self[index]
@@ -4,6 +4,8 @@ from typing import TYPE_CHECKING, Union
 if TYPE_CHECKING:
     from .functions import LoxFunction
     from .classes import LoxClass, LoxInstance
+    from .rope import Rope
 
 
-LoxType = Union[str, Decimal, bool, None, 'LoxFunction', 'LoxClass', 'LoxInstance']
+LoxType = Union[str, 'Rope', Decimal, int, float, bool, None,
+                'LoxFunction', 'LoxClass', 'LoxInstance']
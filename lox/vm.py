@@ -0,0 +1,442 @@
+from types import SimpleNamespace
+import typing
+
+from .chunk import BytecodeFunction, OpCode
+from .classes import LoxClass, LoxInstance
+from .compiler import Compiler
+from .engine import Engine
+from .exceptions import LoxError, NativeError, RunError
+from .expressions import Literal
+from .functions import Callable
+from .natives import native_functions
+from .numeric import NUMERIC_MODES, Numbers
+from .rope import Rope, concat
+from .statements import Stmt
+from .token import Token, TokenType
+from .types import LoxType
+
+
+# Comparing plain integers is considerably faster than comparing enum members.
+Op = SimpleNamespace(**{op.name: op.value for op in OpCode})
+
+
+class Upvalue:
+    __slots__ = ('location', 'value', 'is_open')
+
+    def __init__(self, location: int):
+        self.location = location
+        self.value: LoxType = None
+        self.is_open = True
+
+
+class Closure(Callable):
+
+    def __init__(self, function: BytecodeFunction, upvalues: list[Upvalue]):
+        self.function = function
+        self.upvalues = upvalues
+
+    @property
+    def arity(self) -> int:
+        return self.function.arity
+
+    def call(self, engine: Engine, arguments: list[LoxType]) -> LoxType:
+        return engine.call_nested(self, arguments)
+
+    def bind(self, instance: LoxInstance) -> 'BoundMethod':
+        return BoundMethod(instance, self)
+
+    def __str__(self) -> str:
+        return str(self.function)
+
+
+class BoundMethod(Callable):
+
+    def __init__(self, receiver: LoxInstance, method: Closure):
+        self.receiver = receiver
+        self.method = method
+
+    @property
+    def arity(self) -> int:
+        return self.method.arity
+
+    def call(self, engine: Engine, arguments: list[LoxType]) -> LoxType:
+        return engine.call_nested(self, arguments)
+
+    def __str__(self) -> str:
+        return str(self.method)
+
+
+class CallFrame:
+    __slots__ = ('closure', 'ip', 'base')
+
+    def __init__(self, closure: Closure, base: int):
+        self.closure = closure
+        self.ip = 0
+        self.base = base
+
+
+class VM:
+    """Stack based virtual machine executing code compiled by `Compiler`.
+
+    Has the same interface as `Interpreter` so that it can be used with
+    `Resolver` and `Lox`. Resolution results are not needed, though,
+    because the compiler resolves local variables itself.
+    """
+    max_frames = 10_000
+
+    def __init__(self, error_reporter: typing.Callable[[LoxError], None],
+                 numbers: Numbers = NUMERIC_MODES['decimal']):
+        self.numbers = numbers
+        self.globals: dict[str, typing.Any] = dict(native_functions(numbers))
+        self.stack: list[typing.Any] = []
+        self.frames: list[CallFrame] = []
+        self.open_upvalues: dict[int, Upvalue] = {}
+        self.error_reporter = error_reporter
+        # Where `print` writes. `None` means `sys.stdout`.
+        self.stdout: typing.TextIO|None = None
+
+    def interpret(self, statements: list[Stmt]):
+        try:
+            function = Compiler().compile(statements)
+        except LoxError as err:
+            self.error_reporter(err)
+        else:
+            self.interpret_compiled(function)
+
+    def interpret_compiled(self, function: BytecodeFunction):
+        try:
+            closure = Closure(function, [])
+            self.stack.append(closure)
+            self.call(closure, 0)
+            self.run()
+        except LoxError as err:
+            self.stack.clear()
+            self.frames.clear()
+            self.open_upvalues.clear()
+            self.error_reporter(err)
+
+    def call_nested(self, callee: Callable, arguments: list[LoxType]) -> LoxType:
+        """Calls `callee` from Python code, for example, from a native function."""
+        if not isinstance(callee, (Closure, BoundMethod)):
+            return callee.call(self, arguments)
+        self.stack.append(callee)
+        self.stack.extend(arguments)
+        depth = len(self.frames)
+        self.call_value(callee, len(arguments))
+        return self.run(depth)
+
+    def run(self, exit_depth: int = 0) -> LoxType:
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        frames = self.frames
+        globals = self.globals
+        numbers = self.numbers.types
+        divide = self.numbers.divide
+        frame = frames[-1]
+        code = frame.closure.function.chunk.code
+        constants = frame.closure.function.chunk.constants
+        base = frame.base
+        ip = frame.ip
+        while True:
+            op = code[ip]
+            ip += 1
+            match op:
+                case Op.GET_LOCAL:
+                    push(stack[base + code[ip]])
+                    ip += 1
+                case Op.SET_LOCAL:
+                    stack[base + code[ip]] = stack[-1]
+                    ip += 1
+                case Op.CONSTANT:
+                    push(constants[code[ip] << 8 | code[ip+1]])
+                    ip += 2
+                case Op.GET_GLOBAL:
+                    name = constants[code[ip] << 8 | code[ip+1]]
+                    ip += 2
+                    try:
+                        push(globals[name])
+                    except KeyError:
+                        frame.ip = ip
+                        raise self.runtime_error(f"Undefined variable '{name}'.")
+                case Op.POP:
+                    pop()
+                case Op.JUMP_IF_FALSE:
+                    if not stack[-1]:
+                        ip += code[ip] << 8 | code[ip+1]
+                    ip += 2
+                case Op.JUMP:
+                    ip += (code[ip] << 8 | code[ip+1]) + 2
+                case Op.LOOP:
+                    ip -= (code[ip] << 8 | code[ip+1]) - 2
+                case Op.ADD:
+                    b = pop()
+                    a = stack[-1]
+                    if type(a) in numbers and type(b) in numbers:
+                        try:
+                            stack[-1] = a + b
+                        except OverflowError:
+                            frame.ip = ip
+                            raise self.runtime_error('Numeric overflow.') from None
+                    elif isinstance(a, (str, Rope)) and isinstance(b, (str, Rope)):
+                        stack[-1] = concat(a, b)
+                    else:
+                        frame.ip = ip
+                        raise self.runtime_error(f'Operands must be two numbers or two '
+                                                 f'strings, got {(a, b)}.')
+                case Op.SUBTRACT:
+                    b = pop()
+                    a = stack[-1]
+                    if not (type(a) in numbers and type(b) in numbers):
+                        frame.ip = ip
+                        raise self.number_operands_error(a, b)
+                    try:
+                        stack[-1] = a - b
+                    except OverflowError:
+                        frame.ip = ip
+                        raise self.runtime_error('Numeric overflow.') from None
+                case Op.LESS:
+                    b = pop()
+                    a = stack[-1]
+                    if not (type(a) in numbers and type(b) in numbers):
+                        frame.ip = ip
+                        raise self.number_operands_error(a, b)
+                    stack[-1] = a < b
+                case Op.CALL:
+                    argc = code[ip]
+                    frame.ip = ip + 1
+                    self.call_value(stack[-1 - argc], argc)
+                    frame = frames[-1]
+                    code = frame.closure.function.chunk.code
+                    constants = frame.closure.function.chunk.constants
+                    base = frame.base
+                    ip = frame.ip
+                case Op.RETURN:
+                    result = pop()
+                    if self.open_upvalues:
+                        self.close_upvalues(base)
+                    frames.pop()
+                    del stack[base:]
+                    if len(frames) == exit_depth:
+                        return result
+                    push(result)
+                    frame = frames[-1]
+                    code = frame.closure.function.chunk.code
+                    constants = frame.closure.function.chunk.constants
+                    base = frame.base
+                    ip = frame.ip
+                case Op.TAIL_CALL:
+                    argc = code[ip]
+                    frame.ip = ip + 1
+                    callee = stack[-1 - argc]
+                    if (type(callee) is Closure or type(callee) is BoundMethod) \
+                            and callee.arity == argc:
+                        # Replace the running frame with the called function.
+                        if self.open_upvalues:
+                            self.close_upvalues(base)
+                        stack[base:] = stack[-1 - argc:]
+                        frames.pop()
+                    self.call_value(callee, argc)
+                    frame = frames[-1]
+                    code = frame.closure.function.chunk.code
+                    constants = frame.closure.function.chunk.constants
+                    base = frame.base
+                    ip = frame.ip
+                case Op.GET_UPVALUE:
+                    upvalue = frame.closure.upvalues[code[ip]]
+                    push(stack[upvalue.location] if upvalue.is_open else upvalue.value)
+                    ip += 1
+                case Op.SET_UPVALUE:
+                    upvalue = frame.closure.upvalues[code[ip]]
+                    if upvalue.is_open:
+                        stack[upvalue.location] = stack[-1]
+                    else:
+                        upvalue.value = stack[-1]
+                    ip += 1
+                case Op.GET_PROPERTY:
+                    name = constants[code[ip] << 8 | code[ip+1]]
+                    ip += 2
+                    instance = stack[-1]
+                    if not isinstance(instance, LoxInstance):
+                        frame.ip = ip
+                        raise self.runtime_error('Only instances have properties.')
+                    stack[-1] = instance.get(name)
+                case Op.SET_PROPERTY:
+                    name = constants[code[ip] << 8 | code[ip+1]]
+                    ip += 2
+                    value = pop()
+                    instance = stack[-1]
+                    if not isinstance(instance, LoxInstance):
+                        frame.ip = ip
+                        raise self.runtime_error('Only instances have properties.')
+                    instance.set(name, value)
+                    stack[-1] = None
+                case Op.NIL:
+                    push(None)
+                case Op.TRUE:
+                    push(True)
+                case Op.FALSE:
+                    push(False)
+                case Op.SET_GLOBAL:
+                    name = constants[code[ip] << 8 | code[ip+1]]
+                    ip += 2
+                    if name not in globals:
+                        frame.ip = ip
+                        raise self.runtime_error(f"Undefined variable '{name}'.")
+                    globals[name] = stack[-1]
+                case Op.DEFINE_GLOBAL:
+                    globals[constants[code[ip] << 8 | code[ip+1]]] = pop()
+                    ip += 2
+                case Op.EQUAL:
+                    b = pop()
+                    stack[-1] = stack[-1] == b
+                case Op.NOT_EQUAL:
+                    b = pop()
+                    stack[-1] = stack[-1] != b
+                case Op.GREATER:
+                    b = pop()
+                    a = stack[-1]
+                    if not (type(a) in numbers and type(b) in numbers):
+                        frame.ip = ip
+                        raise self.number_operands_error(a, b)
+                    stack[-1] = a > b
+                case Op.GREATER_EQUAL:
+                    b = pop()
+                    a = stack[-1]
+                    if not (type(a) in numbers and type(b) in numbers):
+                        frame.ip = ip
+                        raise self.number_operands_error(a, b)
+                    stack[-1] = a >= b
+                case Op.LESS_EQUAL:
+                    b = pop()
+                    a = stack[-1]
+                    if not (type(a) in numbers and type(b) in numbers):
+                        frame.ip = ip
+                        raise self.number_operands_error(a, b)
+                    stack[-1] = a <= b
+                case Op.MULTIPLY:
+                    b = pop()
+                    a = stack[-1]
+                    if not (type(a) in numbers and type(b) in numbers):
+                        frame.ip = ip
+                        raise self.number_operands_error(a, b)
+                    try:
+                        stack[-1] = a * b
+                    except OverflowError:
+                        frame.ip = ip
+                        raise self.runtime_error('Numeric overflow.') from None
+                case Op.DIVIDE:
+                    b = pop()
+                    a = stack[-1]
+                    if not (type(a) in numbers and type(b) in numbers):
+                        frame.ip = ip
+                        raise self.number_operands_error(a, b)
+                    if b == 0:
+                        frame.ip = ip
+                        raise self.runtime_error('Division by zero.')
+                    try:
+                        stack[-1] = divide(a, b)
+                    except OverflowError:
+                        frame.ip = ip
+                        raise self.runtime_error('Numeric overflow.') from None
+                case Op.NOT:
+                    stack[-1] = not stack[-1]
+                case Op.NEGATE:
+                    a = stack[-1]
+                    if type(a) not in numbers:
+                        frame.ip = ip
+                        raise self.number_operands_error(a)
+                    stack[-1] = -a
+                case Op.PRINT:
+                    print(Literal(pop()), file=self.stdout)
+                case Op.CLOSURE:
+                    function = constants[code[ip] << 8 | code[ip+1]]
+                    ip += 2
+                    upvalues = []
+                    for _ in range(function.upvalue_count):
+                        is_local, index = code[ip], code[ip+1]
+                        ip += 2
+                        if is_local:
+                            upvalues.append(self.capture_upvalue(base + index))
+                        else:
+                            upvalues.append(frame.closure.upvalues[index])
+                    push(Closure(function, upvalues))
+                case Op.CLOSE_UPVALUE:
+                    self.close_upvalues(len(stack) - 1)
+                    pop()
+                case Op.GET_SUPER:
+                    name = constants[code[ip] << 8 | code[ip+1]]
+                    ip += 2
+                    superclass = pop()
+                    method = superclass.find_method(name.lexeme)
+                    if method is None:
+                        raise RunError(f"Undefined property '{name.lexeme}'.", name)
+                    stack[-1] = method.bind(stack[-1])
+                case Op.CLASS:
+                    name = constants[code[ip] << 8 | code[ip+1]]
+                    count, has_superclass = code[ip+2], code[ip+3]
+                    ip += 4
+                    methods = stack[len(stack)-count:]
+                    del stack[len(stack)-count:]
+                    superclass = stack[-1] if has_superclass else None
+                    if has_superclass and not isinstance(superclass, LoxClass):
+                        frame.ip = ip
+                        raise self.runtime_error('Superclass must be a class.')
+                    push(LoxClass(name, superclass,
+                                  {m.function.name: m for m in methods}))
+                case _:
+                    raise RuntimeError(f'Unknown opcode {op}.')
+
+    def call_value(self, callee: typing.Any, argc: int):
+        if isinstance(callee, Closure):
+            self.call(callee, argc)
+        elif isinstance(callee, BoundMethod):
+            self.stack[-1 - argc] = callee.receiver
+            self.call(callee.method, argc)
+        elif isinstance(callee, LoxClass):
+            self.stack[-1 - argc] = LoxInstance(callee)
+            initializer = callee.find_method('init')
+            if initializer is not None:
+                self.call(initializer, argc)
+            elif argc:
+                raise self.runtime_error(f'Expected 0 arguments but got {argc}.')
+        elif isinstance(callee, Callable):
+            if callee.arity != argc:
+                raise self.runtime_error(f'Expected {callee.arity} arguments but '
+                                         f'got {argc}.')
+            arguments = self.stack[len(self.stack)-argc:]
+            try:
+                result = callee.call(self, arguments)
+            except NativeError as err:
+                raise self.runtime_error(str(err)) from None
+            del self.stack[len(self.stack)-argc-1:]
+            self.stack.append(result)
+        else:
+            raise self.runtime_error('Can only call functions and classes.')
+
+    def call(self, closure: Closure, argc: int):
+        if closure.function.arity != argc:
+            raise self.runtime_error(f'Expected {closure.function.arity} arguments '
+                                     f'but got {argc}.')
+        if len(self.frames) == self.max_frames:
+            raise self.runtime_error('Stack overflow.')
+        self.frames.append(CallFrame(closure, len(self.stack) - argc - 1))
+
+    def capture_upvalue(self, location: int) -> Upvalue:
+        if location not in self.open_upvalues:
+            self.open_upvalues[location] = Upvalue(location)
+        return self.open_upvalues[location]
+
+    def close_upvalues(self, last: int):
+        for location in [loc for loc in self.open_upvalues if loc >= last]:
+            upvalue = self.open_upvalues.pop(location)
+            upvalue.value = self.stack[location]
+            upvalue.is_open = False
+
+    def number_operands_error(self, *operands: LoxType) -> RunError:
+        return self.runtime_error(f'Operands must be numbers, got {operands}.')
+
+    def runtime_error(self, message: str) -> RunError:
+        frame = self.frames[-1]
+        line = frame.closure.function.chunk.lines[frame.ip - 1]
+        return RunError(message, Token(TokenType.EOF, '', None, line))
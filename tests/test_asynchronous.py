@@ -0,0 +1,10 @@
+from lox.program import compile
+
+
+def test_sleep_too_long():
+    program = compile('''
+    var big = 1;
+    for (var i = 0; i < 400; i = i + 1) big = big * 10;
+    sleep(big);
+    ''', 'async', 'int-float')
+    assert program.run().errors == ['[line 4] Error: Sleeping time is too long.']
@@ -0,0 +1,32 @@
+import pytest
+
+from lox.program import compile
+
+
+ENGINES = ['interpreter', 'closures', 'stackless', 'async', 'fibers', 'vm']
+
+BIG = '''
+var big = 1;
+for (var i = 0; i < 400; i = i + 1) big = big * 10;
+'''
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('expression', ['big / 3', 'big + 0.5', 'big - 0.5',
+                                        '1.5 * big', '0.5 / big'])
+def test_int_float_overflow(engine, expression):
+    program = compile(f'{BIG}print {expression};', engine, 'int-float')
+    result = program.run()
+    assert result.errors == ['[line 4] Error: Numeric overflow.']
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_int_float_huge_integers(engine):
+    program = compile(f'{BIG}print big / big; print big > 0.5;', engine, 'int-float')
+    assert program.run().output == '1\ntrue\n'
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_int_float_overflow_in_array(engine):
+    program = compile(f'{BIG}var a = array(1);\nset(a, 0, big);', engine, 'int-float')
+    assert program.run().errors == ['[line 5] Error: Number is too large for an array.']
@@ -0,0 +1,36 @@
+import pytest
+
+from lox.exceptions import CompilationFailed
+from lox.program import compile
+
+
+BREAK_IN_FUNCTION = '''
+while (true) {
+  fun f() { break; }
+  f();
+}
+'''
+
+
+@pytest.mark.parametrize('engine', ['interpreter', 'closures', 'stackless'])
+def test_break_in_function_declared_in_loop(engine):
+    with pytest.raises(CompilationFailed) as info:
+        compile(BREAK_IN_FUNCTION, engine)
+    assert info.value.errors == [
+        "[line 3] Error at 'break': Cannot use 'break' outside loop."
+    ]
+
+
+@pytest.mark.parametrize('engine', ['interpreter', 'closures', 'stackless'])
+def test_break_in_loop_inside_function(engine):
+    program = compile('''
+    while (true) {
+      fun f() {
+        while (true) break;
+        return 1;
+      }
+      print f();
+      break;
+    }
+    ''', engine)
+    assert program.run().output == '1\n'
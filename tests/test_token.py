@@ -0,0 +1,43 @@
+from lox.astprinter import AstPrinter
+from lox.parser import Parser
+from lox.scanner import Scanner
+from lox.token import Token, TokenArray, TokenType
+
+
+SOURCE = '''
+fun greet(name) {
+  var greeting = "Hello, " + name;
+  print greeting;
+  return 42.5;
+}
+greet("world");
+'''
+
+
+def scan(source: str):
+    return Scanner(source, lambda line, message: None)
+
+
+def test_token_array_equals_token_list():
+    tokens = scan(SOURCE).scan_tokens()
+    array = scan(SOURCE).scan_token_array()
+    assert len(array) == len(tokens)
+    assert list(array) == tokens
+    assert array[-1] == tokens[-1]
+    assert array[2:5] == tokens[2:5]
+
+
+def test_token_array_stores_lexemes_once():
+    array = TokenArray([Token(TokenType.IDENTIFIER, 'name', None, line)
+                        for line in range(1, 4)])
+    assert array.lexemes == ['name']
+    assert [token.line for token in array] == [1, 2, 3]
+
+
+def test_parse_token_array(capsys):
+    def parse(tokens):
+        for stmt in Parser(tokens, lambda token, message: None).parse():
+            AstPrinter().print(stmt)
+        return capsys.readouterr().out
+
+    assert parse(scan(SOURCE).scan_token_array()) == parse(scan(SOURCE).scan_tokens())
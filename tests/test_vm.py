@@ -0,0 +1,33 @@
+import pytest
+
+from lox.exceptions import CompilationFailed
+from lox.program import compile
+
+
+def test_break_in_function_declared_in_loop():
+    # The function is never called, but compiling it used to fail.
+    with pytest.raises(CompilationFailed) as info:
+        compile('while (true) { fun f() { break; } }', 'vm')
+    assert info.value.errors == [
+        "[line 1] Error at 'break': Cannot use 'break' outside loop."
+    ]
+
+
+def test_break_in_loop_inside_function():
+    program = compile('''
+    var i = 0;
+    while (true) {
+      fun f() {
+        var j = 0;
+        while (true) {
+          j = j + 1;
+          if (j == 3) break;
+        }
+        return j;
+      }
+      print f() + i;
+      i = i + 1;
+      if (i == 2) break;
+    }
+    ''', 'vm')
+    assert program.run().output == '3\n4\n'